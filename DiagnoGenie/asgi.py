@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DiagnoGenie.settings')
 
 application = get_asgi_application()
+
+if settings.LLM_PREWARM:
+    # Load LangChain, Groq and the PDF backend before the first request, not during it
+    from core.utils.prewarm import prewarm
+
+    prewarm()
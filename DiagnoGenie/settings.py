@@ -13,9 +13,14 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Read GROQ_API_KEY and the other settings below from .env, once per process
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -39,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     
     #apps
+    'core',
     'accounts',
     'report_summarizer',
     'prescription_summarizer',
@@ -49,6 +55,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,12 +95,30 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Job workers and web requests write concurrently; wait for locks instead of failing.
+        # IMMEDIATE takes the write lock when a transaction starts, so the timeout applies
+        # instead of an instant "database is locked" when a reader tries to upgrade.
+        'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'},
     }
 }
 
 
+# JWT authentication
+# With JWT_STATELESS_AUTH, API requests build request.user from the access token's
+# claims instead of loading the user row. Deactivation, privilege and password
+# changes are checked against a per-user state cached for JWT_AUTH_STATE_CACHE_TTL
+# seconds. The cache must be shared by every worker process, so that saving a user
+# invalidates the state everywhere at once: it defaults to a file-based cache (one
+# host); point JWT_AUTH_STATE_CACHE_BACKEND/LOCATION at Redis or the database when
+# running on several hosts. A per-process cache (locmem) fails the system checks.
+JWT_STATELESS_AUTH = os.getenv("JWT_STATELESS_AUTH", "true").lower() == "true"
+JWT_AUTH_STATE_CACHE_ALIAS = "auth_state"
+JWT_AUTH_STATE_CACHE_TTL = int(os.getenv("JWT_AUTH_STATE_CACHE_TTL", "30"))
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'accounts.authentication.StatelessJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -108,6 +133,11 @@ CACHES = {
         "LOCATION": "unique-snowflake",
     }
 }
+CACHES[JWT_AUTH_STATE_CACHE_ALIAS] = {
+    "BACKEND": os.getenv("JWT_AUTH_STATE_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+    "LOCATION": os.getenv("JWT_AUTH_STATE_CACHE_LOCATION", str(BASE_DIR / ".cache" / "auth_state")),
+    "TIMEOUT": JWT_AUTH_STATE_CACHE_TTL,
+}
 
 # Simple JWT settings 
 from datetime import timedelta
@@ -153,6 +183,24 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'no-reply@example.com'
 
+# Email outbox
+# Emails are queued in the database and delivered by `manage.py send_outbox_emails`,
+# which sends up to EMAIL_OUTBOX_BATCH_SIZE emails per mail connection. Failed emails
+# are retried with jittered exponential backoff (EMAIL_OUTBOX_BACKOFF_BASE doubling
+# up to EMAIL_OUTBOX_BACKOFF_MAX seconds) and marked failed after EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_POLL_INTERVAL = float(os.getenv("EMAIL_OUTBOX_POLL_INTERVAL", "2"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_BACKOFF_BASE = float(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX", "3600"))
+# Emails claimed by a sender that stopped this many seconds ago are sent again.
+EMAIL_OUTBOX_STALE_AFTER = int(os.getenv("EMAIL_OUTBOX_STALE_AFTER", "300"))
+# Seconds between queue depth reports in the sender's output.
+EMAIL_OUTBOX_REPORT_INTERVAL = float(os.getenv("EMAIL_OUTBOX_REPORT_INTERVAL", "60"))
+# Sent and failed emails are deleted after this many seconds. Their bodies, which hold the
+# signed verification link, are already cleared once they are sent or given up on.
+EMAIL_OUTBOX_RETENTION = int(os.getenv("EMAIL_OUTBOX_RETENTION", str(7 * 24 * 60 * 60)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -194,3 +242,179 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Logging
+# Application loggers write INFO and above to the console.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(levelname)s:%(name)s:%(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv("LOG_LEVEL", "INFO"),
+    },
+    'loggers': {
+        # Django's own console handler would print these a second time
+        'django': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
+# LLM clients
+# Clients are shared per process and keep pooled HTTP connections alive.
+# LangChain, Groq and the PDF libraries are imported on first use. Set LLM_PREWARM=true
+# to import them and build the default clients when a WSGI/ASGI worker starts instead.
+LLM_PREWARM = os.getenv("LLM_PREWARM", "false").lower() == "true"
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20"))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+LLM_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+# Point the clients at another OpenAI-compatible server, e.g. the local stub from
+# `manage.py fake_groq_server` (LLM_BASE_URL=http://127.0.0.1:8765) for load tests.
+LLM_BASE_URL = os.getenv("LLM_BASE_URL") or None
+
+# LLM admission control
+# Every Groq call is counted against these per-minute budgets in the database,
+# so all workers and processes share them. Match them to the account's limits.
+#
+# The token budget bounds how large a report can be summarized within a deadline. Each
+# call reserves its estimated prompt plus its completion limit; a map-reduce chunk call
+# reserves about REPORT_SUMMARY_CHUNK_TOKENS + 500, so at 12000 tokens per minute only
+# three chunks run per minute, whatever REPORT_SUMMARY_MAP_MAX_WORKERS allows. Within the
+# 120s summarize_report deadline that is about five chunks plus the final merge, i.e.
+# reports up to roughly 15000 estimated tokens when nothing else is using the budget.
+# Larger reports belong on the summarize-report/jobs/ endpoint (REPORT_SUMMARY_JOB_DEADLINE);
+# on a higher Groq tier raise LLM_TOKENS_PER_MINUTE, and the same deadline covers more.
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "12000"))
+# Completion tokens assumed for chains without max_tokens.
+LLM_DEFAULT_COMPLETION_TOKENS = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", "500"))
+# Callers over budget queue for up to LLM_ADMISSION_MAX_WAIT seconds (never past their
+# request deadline); beyond LLM_ADMISSION_MAX_QUEUE waiters, or after the wait, requests
+# get 429 + Retry-After. The default lets a queued call wait for the next minute's budget.
+LLM_ADMISSION_MAX_WAIT = float(os.getenv("LLM_ADMISSION_MAX_WAIT", "60"))
+LLM_ADMISSION_MAX_QUEUE = int(os.getenv("LLM_ADMISSION_MAX_QUEUE", "50"))
+
+# LLM resilience
+# Transient Groq failures (connection errors, 429s, 5xx) are retried with jittered
+# exponential backoff. After LLM_CIRCUIT_FAILURE_THRESHOLD consecutive failures
+# calls fail fast with 503 for LLM_CIRCUIT_RESET_TIMEOUT seconds.
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BACKOFF_MAX = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+LLM_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+LLM_CIRCUIT_RESET_TIMEOUT = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))
+# Hedging sends a duplicate request when a call outlives the p95 latency of the
+# last calls (once LLM_HEDGE_MIN_SAMPLES are known). It trades tokens for tail latency.
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MAX_WORKERS = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "32"))
+# Client timeout of a single Groq HTTP request, shortened to the request deadline.
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+
+# Request deadlines
+# Seconds each endpoint (or background job kind) may spend on extraction and LLM
+# calls; 0 disables. Work still pending at the deadline is reported as timed out.
+REQUEST_DEADLINES = {
+    "summarize_report": float(os.getenv("SUMMARIZE_REPORT_DEADLINE", "120")),
+    "summarize_report_stream": float(os.getenv("SUMMARIZE_REPORT_STREAM_DEADLINE", "300")),
+    "prescription_upload": float(os.getenv("PRESCRIPTION_UPLOAD_DEADLINE", "60")),
+    "report_summary_job": float(os.getenv("REPORT_SUMMARY_JOB_DEADLINE", "1800")),
+    "prescription_analysis_job": float(os.getenv("PRESCRIPTION_ANALYSIS_JOB_DEADLINE", "600")),
+}
+
+# Report summarization
+# Upper bound on files summarized concurrently within one upload batch.
+REPORT_SUMMARY_MAX_WORKERS = int(os.getenv("REPORT_SUMMARY_MAX_WORKERS", "4"))
+# Reports estimated above this many input tokens are summarized with map-reduce:
+# chunks of REPORT_SUMMARY_CHUNK_TOKENS are condensed in parallel, then merged.
+REPORT_SUMMARY_INPUT_TOKEN_BUDGET = int(os.getenv("REPORT_SUMMARY_INPUT_TOKEN_BUDGET", "6000"))
+REPORT_SUMMARY_CHUNK_TOKENS = int(os.getenv("REPORT_SUMMARY_CHUNK_TOKENS", "3000"))
+REPORT_SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv("REPORT_SUMMARY_CHUNK_OVERLAP_TOKENS", "100"))
+REPORT_SUMMARY_MAP_MAX_WORKERS = int(os.getenv("REPORT_SUMMARY_MAP_MAX_WORKERS", "4"))
+
+# Summaries are cached by content hash in a cache shared by every worker
+# process. The file-based default works for a single host; point
+# SUMMARY_CACHE_BACKEND/SUMMARY_CACHE_LOCATION at a database or Redis cache
+# when running on several hosts.
+SUMMARY_CACHE_ALIAS = "summaries"
+SUMMARY_CACHE_ENABLED = os.getenv("SUMMARY_CACHE_ENABLED", "true").lower() == "true"
+SUMMARY_CACHE_TTL = int(os.getenv("SUMMARY_CACHE_TTL", str(7 * 24 * 60 * 60)))
+CACHES[SUMMARY_CACHE_ALIAS] = {
+    "BACKEND": os.getenv("SUMMARY_CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+    "LOCATION": os.getenv("SUMMARY_CACHE_LOCATION", str(BASE_DIR / ".cache" / "summaries")),
+    "TIMEOUT": SUMMARY_CACHE_TTL,
+    "OPTIONS": {
+        "MAX_ENTRIES": int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "10000")),
+    },
+}
+
+# Prescription analysis
+# Upper bound on concurrent medication purpose lookups per prescription.
+PRESCRIPTION_PURPOSE_MAX_WORKERS = int(os.getenv("PRESCRIPTION_PURPOSE_MAX_WORKERS", "8"))
+# Medication purposes are stored by normalized name and refreshed after the TTL.
+MEDICATION_PURPOSE_TTL = int(os.getenv("MEDICATION_PURPOSE_TTL", str(30 * 24 * 60 * 60)))
+MEDICATION_PURPOSE_LRU_SIZE = int(os.getenv("MEDICATION_PURPOSE_LRU_SIZE", "4096"))
+# Default analysis mode when a request does not pass ?mode=: "multi" or "single".
+PRESCRIPTION_ANALYSIS_MODE = os.getenv("PRESCRIPTION_ANALYSIS_MODE", "multi")
+
+# Prompt reduction
+# Extracted text is trimmed before it reaches the LLM: lines repeated on at least
+# this fraction of the pages (letterheads, footers) are kept only once, and lines
+# matching any of the PROMPT_BOILERPLATE_PATTERNS regexes are dropped.
+PROMPT_REDUCER_ENABLED = os.getenv("PROMPT_REDUCER_ENABLED", "true").lower() == "true"
+PROMPT_REPEATED_LINE_MIN_FRACTION = float(os.getenv("PROMPT_REPEATED_LINE_MIN_FRACTION", "0.5"))
+PROMPT_BOILERPLATE_PATTERNS = [
+    r"^page\s*\d+(\s*(of|/)\s*\d+)?$",
+    r"^-\s*\d+\s*-$",
+    r"(electronically|computer|system)[\s-]generated (report|document)",
+    r"does not require (a )?signature",
+    r"^(this|the information in this) (report|document|e-?mail) is (strictly )?confidential",
+]
+
+# Uploads
+# Uploads up to this size are handed to the PDF extractors as bytes; larger
+# ones are read from a temporary file that is removed after extraction.
+UPLOAD_IN_MEMORY_MAX_SIZE = int(os.getenv("UPLOAD_IN_MEMORY_MAX_SIZE", str(10 * 1024 * 1024)))
+
+# PDF text extraction backend shared by both apps: "pypdfium2", "pymupdf" or
+# "pdfplumber". Compare them with `manage.py benchmark_pdf_backends <corpus>`.
+PDF_EXTRACTION_BACKEND = os.getenv("PDF_EXTRACTION_BACKEND", "pypdfium2")
+# Documents with at least this many pages are extracted in parallel page
+# ranges on a pool of PDF_EXTRACTION_PROCESSES worker processes (0 disables).
+PDF_PARALLEL_PAGE_THRESHOLD = int(os.getenv("PDF_PARALLEL_PAGE_THRESHOLD", "64"))
+PDF_EXTRACTION_PROCESSES = int(os.getenv("PDF_EXTRACTION_PROCESSES", str(min(4, os.cpu_count() or 1))))
+# Extracted pages are cached on disk by upload hash, extractor backend and version.
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", str(BASE_DIR / ".cache" / "extractions"))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+# Writes between eviction sweeps, each of which scans the whole cache directory.
+EXTRACTION_CACHE_EVICT_EVERY = int(os.getenv("EXTRACTION_CACHE_EVICT_EVERY", "100"))
+
+# Metrics
+# /metrics serves per-process Prometheus metrics; scrape every worker process.
+# When METRICS_TOKEN is set, scrapers must send "Authorization: Bearer <token>".
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Background jobs
+# Run `manage.py run_workers` to process jobs submitted to the */jobs/ endpoints.
+JOB_HANDLERS = {
+    "report_summary": "report_summarizer.jobs.run_report_summary_job",
+    "prescription_analysis": "prescription_summarizer.jobs.run_prescription_analysis_job",
+}
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# Workers refresh a running job's heartbeat every JOB_HEARTBEAT_INTERVAL seconds, however
+# long the job runs. Jobs without a heartbeat for JOB_STALE_AFTER seconds (a few missed
+# beats) are requeued, up to JOB_MAX_ATTEMPTS runs; each worker process sweeps for them
+# every JOB_RECOVERY_INTERVAL seconds, so a crashed worker's jobs resume within about
+# JOB_STALE_AFTER + JOB_RECOVERY_INTERVAL.
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", str(3 * JOB_HEARTBEAT_INTERVAL)))
+JOB_RECOVERY_INTERVAL = float(os.getenv("JOB_RECOVERY_INTERVAL", str(JOB_HEARTBEAT_INTERVAL)))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
@@ -17,9 +17,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include("accounts.urls")),
     path('api/reports/', include("report_summarizer.urls")),
-    path('api/prescription/', include("prescription_summarizer.urls"))
+    path('api/prescription/', include("prescription_summarizer.urls")),
+    path('api/jobs/', include("core.urls")),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DiagnoGenie.settings')
 
 application = get_wsgi_application()
+
+if settings.LLM_PREWARM:
+    # Load LangChain, Groq and the PDF backend before the first request, not during it
+    from core.utils.prewarm import prewarm
+
+    prewarm()
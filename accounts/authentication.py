@@ -0,0 +1,118 @@
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+logger = logging.getLogger(__name__)
+
+# Claims copied into every token; request.user is rebuilt from them
+USER_CLAIMS = ("email", "is_active", "is_staff")
+# Fingerprint of the password hash, so a password change revokes older tokens
+PASSWORD_CLAIM = "auth_hash"
+AUTH_STATE_CLAIMS = USER_CLAIMS + (PASSWORD_CLAIM,)
+
+
+def _cache_key(user_id) -> str:
+    return f"accounts:auth_state:{user_id}"
+
+
+def get_auth_state(user) -> Dict:
+    """The claim values a token for ``user`` must carry"""
+    return {
+        "email": user.email,
+        "is_active": user.is_active,
+        "is_staff": user.is_staff,
+        PASSWORD_CLAIM: get_md5_hash_password(user.password),
+    }
+
+
+def add_auth_claims(token: Token, user) -> Token:
+    """Store the user's auth state in ``token`` so requests can skip the user lookup"""
+    for claim, value in get_auth_state(user).items():
+        token[claim] = value
+    return token
+
+
+def load_auth_state(user_id) -> Optional[Dict]:
+    """
+    Return a user's current auth state, from the shared cache when possible.
+
+    Args:
+        user_id: Value of the token's user id claim
+
+    Returns:
+        Dict: Current claim values, or None if the user no longer exists
+    """
+    cache = caches[settings.JWT_AUTH_STATE_CACHE_ALIAS]
+    key = _cache_key(user_id)
+    state = cache.get(key)
+    if state is not None:
+        return state
+
+    User = get_user_model()
+    try:
+        user = User.objects.only("email", "is_active", "is_staff", "password").get(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
+    except User.DoesNotExist:
+        return None
+    state = get_auth_state(user)
+    cache.set(key, state, settings.JWT_AUTH_STATE_CACHE_TTL)
+    return state
+
+
+def invalidate_auth_state(user_id) -> None:
+    """Drop a user's cached auth state after the account changed"""
+    caches[settings.JWT_AUTH_STATE_CACHE_ALIAS].delete(_cache_key(user_id))
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that builds ``request.user`` from the token's claims.
+
+    Tokens issued by the login view carry the user's email, flags and a
+    password fingerprint. Instead of loading the user row on every request
+    they are compared with the user's auth state, cached for
+    ``JWT_AUTH_STATE_CACHE_TTL`` seconds, so deactivated users and tokens
+    issued before a privilege or password change are rejected. Tokens
+    without these claims fall back to the regular database lookup.
+
+    The user is a ``CustomUser`` instance with only the claim fields loaded:
+    it can be assigned to foreign keys, and any other field is fetched from
+    the database on first access.
+    """
+
+    def get_user(self, validated_token: Token):
+        if any(claim not in validated_token for claim in AUTH_STATE_CLAIMS):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+
+        state = load_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not state["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if any(validated_token[claim] != state[claim] for claim in AUTH_STATE_CLAIMS):
+            raise AuthenticationFailed(
+                "The account changed since this token was issued. Please log in again.",
+                code="token_revoked",
+            )
+
+        User = get_user_model()
+        loaded = {api_settings.USER_ID_FIELD: user_id, **{claim: validated_token[claim] for claim in USER_CLAIMS}}
+        # Like a row loaded with .only(): other fields are deferred and save() only writes these.
+        # from_db() expects the values in model field order.
+        fields = [field.attname for field in User._meta.concrete_fields if field.attname in loaded]
+        return User.from_db(router.db_for_read(User), fields, [loaded[name] for name in fields])
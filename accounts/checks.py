@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only
+PER_PROCESS_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_auth_state_cache(app_configs, **kwargs):
+    """Revocation must reach every worker, so stateless JWT auth needs a shared cache."""
+    if not settings.JWT_STATELESS_AUTH:
+        return []
+    backend = settings.CACHES.get(settings.JWT_AUTH_STATE_CACHE_ALIAS, {}).get("BACKEND")
+    if backend in PER_PROCESS_CACHE_BACKENDS:
+        return [Error(
+            f"The '{settings.JWT_AUTH_STATE_CACHE_ALIAS}' cache uses {backend}, which is not shared between "
+            "processes; other workers would keep accepting revoked tokens.",
+            hint="Set JWT_AUTH_STATE_CACHE_BACKEND to a file-based, database or Redis cache, "
+                 "or disable JWT_STATELESS_AUTH.",
+            id="accounts.E001",
+        )]
+    return []
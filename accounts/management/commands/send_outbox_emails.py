@@ -0,0 +1,71 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.outbox import claim_emails, outbox_depth, prune_finished_emails, requeue_stale_emails, send_emails
+from core.jobs import worker_name
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails in batches, one mail connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Emails sent per mail connection",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help="Seconds to wait when no email is due",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once no email is due")
+        parser.add_argument("--status", action="store_true", help="Print the queue depth as JSON and exit")
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            self.stdout.write(json.dumps(outbox_depth()))
+            return
+
+        name = worker_name()
+        prune_finished_emails()
+        requeued = requeue_stale_emails()
+        if requeued:
+            self.stdout.write(f"Recovered {requeued} stale email(s).")
+        self.stdout.write("Sending outbox emails. Press Ctrl+C to stop.")
+
+        last_recovery = last_report = time.monotonic()
+        try:
+            while True:
+                close_old_connections()
+                if time.monotonic() - last_recovery > settings.EMAIL_OUTBOX_STALE_AFTER:
+                    requeue_stale_emails()
+                    prune_finished_emails()
+                    last_recovery = time.monotonic()
+
+                emails = claim_emails(name, options["batch_size"])
+                if emails:
+                    sent, failed = send_emails(emails)
+                    logger.info(f"Outbox batch: {sent} sent, {failed} failed")
+                if not emails and options["once"]:
+                    self._report_depth()
+                    return
+                if time.monotonic() - last_report > settings.EMAIL_OUTBOX_REPORT_INTERVAL:
+                    self._report_depth()
+                    last_report = time.monotonic()
+                if not emails:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping.")
+
+    def _report_depth(self):
+        depth = outbox_depth()
+        self.stdout.write(
+            f"Outbox: {depth['due']} due (oldest {depth['oldest_due_age_seconds']:.0f}s), "
+            f"{depth['pending']} pending, {depth['sending']} sending, {depth['sent']} sent, {depth['failed']} failed"
+        )
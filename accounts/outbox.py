@@ -0,0 +1,171 @@
+import logging
+import random
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject: str, body: str, to: List[str], from_email: Optional[str] = None) -> OutboxEmail:
+    """
+    Add an email to the outbox instead of sending it now.
+
+    Call it inside the transaction that produced the email: the email is
+    only sent if that transaction commits, and the request never waits for
+    the mail server.
+
+    Args:
+        subject (str): Subject line
+        body (str): Plain-text body
+        to (List[str]): Recipient addresses
+        from_email (str, optional): Sender. Defaults to ``DEFAULT_FROM_EMAIL``
+
+    Returns:
+        OutboxEmail: The pending outbox row
+    """
+    return OutboxEmail.objects.create(
+        subject=subject, body=body, to=list(to), from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def requeue_stale_emails() -> int:
+    """Return emails claimed by a sender that stopped before finishing them. Returns the number requeued."""
+    stale_before = timezone.now() - timedelta(seconds=settings.EMAIL_OUTBOX_STALE_AFTER)
+    return OutboxEmail.objects.filter(status=OutboxEmail.STATUS_SENDING, claimed_at__lt=stale_before).update(
+        status=OutboxEmail.STATUS_PENDING, worker="",
+    )
+
+
+def claim_emails(worker: str, limit: int) -> List[OutboxEmail]:
+    """
+    Atomically claim up to ``limit`` emails that are due.
+
+    Like job claiming, each email is taken with a conditional UPDATE on its
+    status, so concurrent senders never deliver the same email twice.
+
+    Args:
+        worker (str): Identifier recorded on the claimed emails
+        limit (int): Batch size
+
+    Returns:
+        List[OutboxEmail]: The claimed emails, oldest first
+    """
+    candidates = OutboxEmail.objects.filter(
+        status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=timezone.now(),
+    ).order_by("next_attempt_at", "pk").values_list("pk", flat=True)[:limit]
+
+    claimed = []
+    for pk in candidates:
+        if OutboxEmail.objects.filter(pk=pk, status=OutboxEmail.STATUS_PENDING).update(
+            status=OutboxEmail.STATUS_SENDING, worker=worker, claimed_at=timezone.now(),
+            attempts=F("attempts") + 1,
+        ):
+            claimed.append(pk)
+    return list(OutboxEmail.objects.filter(pk__in=claimed).order_by("next_attempt_at", "pk"))
+
+
+def _retry_delay(attempts: int) -> float:
+    """Jittered exponential backoff before the next delivery attempt"""
+    delay = min(settings.EMAIL_OUTBOX_BACKOFF_MAX, settings.EMAIL_OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def _record_failure(email: OutboxEmail, error: Exception) -> None:
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Giving up on outbox email {email.pk} after {email.attempts} attempts: {error}")
+        update = {"status": OutboxEmail.STATUS_FAILED, "body": ""}
+    else:
+        delay = _retry_delay(email.attempts)
+        logger.warning(f"Outbox email {email.pk} failed (attempt {email.attempts}), retrying in {delay:.0f}s: {error}")
+        update = {"status": OutboxEmail.STATUS_PENDING, "next_attempt_at": timezone.now() + timedelta(seconds=delay)}
+    OutboxEmail.objects.filter(pk=email.pk).update(worker="", last_error=str(error), **update)
+
+
+def send_emails(emails: List[OutboxEmail]) -> Tuple[int, int]:
+    """
+    Deliver claimed emails over a single mail backend connection.
+
+    The connection (one SMTP session with the SMTP backend) is opened once
+    for the batch. Messages are handed to it one at a time so that a bad
+    address only fails its own email. If the connection cannot be opened,
+    the whole batch is rescheduled.
+
+    Args:
+        emails (List[OutboxEmail]): Emails returned by ``claim_emails``
+
+    Returns:
+        Tuple[int, int]: Number of emails sent and failed
+    """
+    if not emails:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _record_failure(email, e)
+        return 0, len(emails)
+
+    sent = failed = 0
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject, body=email.body, from_email=email.from_email, to=email.to,
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                _record_failure(email, e)
+                failed += 1
+                continue
+            # The body holds the signed verification link; don't keep it once delivered
+            OutboxEmail.objects.filter(pk=email.pk).update(
+                status=OutboxEmail.STATUS_SENT, sent_at=timezone.now(), worker="", last_error="", body="",
+            )
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def prune_finished_emails() -> int:
+    """
+    Delete sent and failed emails older than ``EMAIL_OUTBOX_RETENTION`` seconds.
+
+    Returns:
+        int: Number of emails deleted
+    """
+    before = timezone.now() - timedelta(seconds=settings.EMAIL_OUTBOX_RETENTION)
+    deleted, _ = OutboxEmail.objects.filter(
+        status__in=[OutboxEmail.STATUS_SENT, OutboxEmail.STATUS_FAILED], created_at__lt=before,
+    ).delete()
+    return deleted
+
+
+def outbox_depth() -> Dict[str, object]:
+    """
+    Summarise the outbox for monitoring.
+
+    Returns:
+        Dict: Email counts per status, how many pending emails are already
+        due, and the age in seconds of the oldest due email
+    """
+    now = timezone.now()
+    counts = dict(OutboxEmail.objects.values_list("status").annotate(count=Count("pk")).order_by())
+    due = OutboxEmail.objects.filter(status=OutboxEmail.STATUS_PENDING, next_attempt_at__lte=now).aggregate(
+        count=Count("pk"), oldest=Min("created_at"),
+    )
+    return {
+        **{status: counts.get(status, 0) for status, _ in OutboxEmail.STATUS_CHOICES},
+        "due": due["count"],
+        "oldest_due_age_seconds": round((now - due["oldest"]).total_seconds(), 1) if due["oldest"] else 0.0,
+    }
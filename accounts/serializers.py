@@ -1,5 +1,4 @@
 from django.core.cache import cache
-from django.core.mail import send_mail
 from django.urls import reverse
 from django.conf import settings
 from rest_framework import serializers
@@ -8,6 +7,7 @@ from django.core import signing
 from django.contrib.auth.hashers import make_password
 from django.conf import settings
 from .models import CustomUser
+from .outbox import queue_email
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -54,8 +54,9 @@ class UserRegistrationSerializer(serializers.Serializer):
         from_email = settings.DEFAULT_FROM_EMAIL
         recipient_list = [validated_data['email']]
 
-        # For development, this prints email to console; in prod configure SMTP
-        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
+        # Queued for `manage.py send_outbox_emails`, so registration never waits on the mail server.
+        # With the console backend the sender prints the email instead.
+        queue_email(subject, message, recipient_list, from_email)
 
         return {"detail": "Verification email sent. Please check your inbox."}
 
@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_auth_state
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def drop_cached_auth_state(sender, instance, **kwargs):
+    """Tokens are checked against the new state on their next request"""
+    invalidate_auth_state(instance.pk)
@@ -1,3 +1,133 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .checks import check_auth_state_cache
+from .models import OutboxEmail
+from .outbox import claim_emails, prune_finished_emails, queue_email, requeue_stale_emails, send_emails
+
+
+# Each test gets an empty auth-state cache instead of the shared one
+AUTH_STATE_CACHES = {
+    **settings.CACHES,
+    settings.JWT_AUTH_STATE_CACHE_ALIAS: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+class OutboxTests(TestCase):
+    def test_registration_queues_the_verification_email(self):
+        response = APIClient().post("/api/auth/register/", {
+            "email": "new@example.com", "password": "Str0ng-pass-9", "password2": "Str0ng-pass-9",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["new@example.com"])
+        self.assertIn("verify-email/?token=", email.body)
+
+    def test_send_delivers_and_clears_the_body(self):
+        queue_email("Verify", "secret link", ["a@example.com"])
+        queue_email("Verify", "secret link", ["b@example.com"])
+        emails = claim_emails("worker-a", 10)
+        self.assertEqual(len(emails), 2)
+        self.assertEqual(claim_emails("worker-b", 10), [])
+
+        self.assertEqual(send_emails(emails), (2, 0))
+        self.assertEqual([message.to for message in mail.outbox], [["a@example.com"], ["b@example.com"]])
+        self.assertFalse(OutboxEmail.objects.exclude(status=OutboxEmail.STATUS_SENT).exists())
+        self.assertFalse(OutboxEmail.objects.exclude(body="").exists())
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_send_is_retried_then_given_up(self):
+        queue_email("Verify", "secret link", ["a@example.com"])
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=OSError("down")):
+            self.assertEqual(send_emails(claim_emails("worker-a", 10)), (0, 1))
+            email = OutboxEmail.objects.get()
+            self.assertEqual(email.status, OutboxEmail.STATUS_PENDING)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # Not due until the backoff has passed
+            self.assertEqual(claim_emails("worker-a", 10), [])
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            send_emails(claim_emails("worker-a", 10))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxEmail.STATUS_FAILED)
+        self.assertEqual(email.body, "")
+
+    @override_settings(EMAIL_OUTBOX_STALE_AFTER=60)
+    def test_stale_claims_are_requeued(self):
+        queue_email("Verify", "secret link", ["a@example.com"])
+        claim_emails("worker-a", 10)
+        OutboxEmail.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_emails(), 1)
+        self.assertEqual(len(claim_emails("worker-b", 10)), 1)
+
+    @override_settings(EMAIL_OUTBOX_RETENTION=60)
+    def test_prune_keeps_recent_and_unsent_emails(self):
+        old = timezone.now() - timedelta(hours=1)
+        for status in (OutboxEmail.STATUS_SENT, OutboxEmail.STATUS_FAILED, OutboxEmail.STATUS_PENDING):
+            email = queue_email("Verify", "", ["a@example.com"])
+            OutboxEmail.objects.filter(pk=email.pk).update(status=status, created_at=old)
+        recent = queue_email("Verify", "", ["b@example.com"])
+        OutboxEmail.objects.filter(pk=recent.pk).update(status=OutboxEmail.STATUS_SENT)
+
+        self.assertEqual(prune_finished_emails(), 2)
+        self.assertEqual(
+            set(OutboxEmail.objects.values_list("status", flat=True)),
+            {OutboxEmail.STATUS_PENDING, OutboxEmail.STATUS_SENT},
+        )
+
+
+@override_settings(CACHES=AUTH_STATE_CACHES)
+class StatelessJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="patient@example.com", password="pass-1234")
+        self.client = APIClient()
+
+    def _login(self, password="pass-1234"):
+        response = self.client.post("/api/auth/login/", {"email": self.user.email, "password": password})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["access"]
+
+    def _current_user(self, token):
+        return self.client.get("/api/auth/current-user/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_requests_skip_the_user_query(self):
+        token = self._login()
+        self._current_user(token)
+        with self.assertNumQueries(0):
+            response = self._current_user(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], self.user.email)
+
+    def test_deactivated_user_is_rejected(self):
+        token = self._login()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._current_user(token).status_code, 401)
+
+    def test_password_change_revokes_older_tokens(self):
+        token = self._login()
+        self.user.set_password("new-pass-5678")
+        self.user.save()
+        self.assertEqual(self._current_user(token).status_code, 401)
+        self.assertEqual(self._current_user(self._login("new-pass-5678")).status_code, 200)
+
+    def test_deleted_user_is_rejected(self):
+        token = self._login()
+        self.user.delete()
+        self.assertEqual(self._current_user(token).status_code, 401)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_process_local_auth_state_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_auth_state_cache(None)], ["accounts.E001"])
+
+    @override_settings(JWT_STATELESS_AUTH=False)
+    def test_any_cache_works_without_stateless_auth(self):
+        self.assertEqual(check_auth_state_cache(None), [])
@@ -14,6 +14,7 @@ from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import render
 from rest_framework.permissions import IsAuthenticated
 from .serializers import CustomUserSerializer
+from .authentication import add_auth_claims
 
 
 User = get_user_model()
@@ -78,6 +79,11 @@ class EmailVerification(APIView):
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        # Lets StatelessJWTAuthentication build request.user without a database query
+        return add_auth_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         # This validates email + password and checks user.is_active
         data = super().validate(attrs)
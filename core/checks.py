@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+
+@register(Tags.compatibility)
+def check_job_timing(app_configs, **kwargs):
+    """Jobs must not be requeued while their worker is alive, nor run forever."""
+    errors = []
+    for name, seconds in settings.REQUEST_DEADLINES.items():
+        if name.endswith("_job") and not seconds:
+            errors.append(Error(
+                f"REQUEST_DEADLINES['{name}'] is disabled, so a hung job would keep its worker busy forever.",
+                hint="Give every *_job kind a deadline.",
+                id="core.E001",
+            ))
+    if settings.JOB_STALE_AFTER < 2 * settings.JOB_HEARTBEAT_INTERVAL:
+        errors.append(Error(
+            f"JOB_STALE_AFTER ({settings.JOB_STALE_AFTER:.0f}s) must be at least twice "
+            f"JOB_HEARTBEAT_INTERVAL ({settings.JOB_HEARTBEAT_INTERVAL:.0f}s); one late heartbeat "
+            "would get a running job requeued.",
+            hint="Leave JOB_STALE_AFTER unset to use three heartbeat intervals.",
+            id="core.E002",
+        ))
+    return errors
+
+
+@register(Tags.compatibility)
+def check_llm_budget(app_configs, **kwargs):
+    """Every kind of LLM call must fit into one minute's token budget, or it is never admitted."""
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return []
+    # Largest single call: one map-reduce chunk plus its completion limit
+    from report_summarizer.utils.summarize_pdf import CHUNK_SUMMARY_MAX_TOKENS
+
+    largest_call = settings.REPORT_SUMMARY_CHUNK_TOKENS + CHUNK_SUMMARY_MAX_TOKENS
+    if largest_call > settings.LLM_TOKENS_PER_MINUTE:
+        return [Warning(
+            f"A report chunk call reserves about {largest_call} tokens, more than "
+            f"LLM_TOKENS_PER_MINUTE ({settings.LLM_TOKENS_PER_MINUTE}); it can only run with the whole "
+            "minute's budget to itself.",
+            hint="Lower REPORT_SUMMARY_CHUNK_TOKENS or raise LLM_TOKENS_PER_MINUTE.",
+            id="core.W001",
+        )]
+    return []
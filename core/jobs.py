@@ -0,0 +1,186 @@
+import logging
+import socket
+import os
+import threading
+from datetime import timedelta
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job, JobFile
+from .utils.deadlines import deadline_for, deadline_scope
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def submit_job(kind: str, files: List, user=None, options: Optional[dict] = None) -> Job:
+    """
+    Persist a job and its uploads so a worker can pick it up.
+
+    Args:
+        kind (str): One of the ``Job.KIND_*`` values
+        files (List): Django ``UploadedFile`` objects, in upload order
+        user: Submitting user, if authenticated
+        options (dict, optional): Handler options, e.g. the analysis mode
+
+    Returns:
+        Job: The pending job
+    """
+    with transaction.atomic():
+        job = Job.objects.create(kind=kind, user=user, options=options or {}, total_items=len(files))
+        JobFile.objects.bulk_create([
+            JobFile(job=job, position=position, name=file.name, content=b"".join(file.chunks()))
+            for position, file in enumerate(files)
+        ])
+    return job
+
+
+def job_uploads(job: Job) -> List[SimpleUploadedFile]:
+    """Rebuild a job's stored files as uploads for the existing pipelines."""
+    return [SimpleUploadedFile(job_file.name, bytes(job_file.content)) for job_file in job.files.all()]
+
+
+def _owned(job: Job):
+    """The job's row, as long as the worker that claimed ``job`` still holds it"""
+    return Job.objects.filter(pk=job.pk, worker=job.worker, status=Job.STATUS_RUNNING)
+
+
+def report_progress(job: Job, result=None, completed: int = 1) -> None:
+    """Record finished items (and optionally partial results) for pollers."""
+    update = {"completed_items": F("completed_items") + completed, "heartbeat_at": timezone.now()}
+    if result is not None:
+        update["result"] = result
+    _owned(job).update(**update)
+
+
+def send_heartbeat(job: Job) -> bool:
+    """Mark a running job as alive. Returns False once another worker has reclaimed it."""
+    return bool(_owned(job).update(heartbeat_at=timezone.now()))
+
+
+@contextmanager
+def heartbeat(job: Job, interval: Optional[float] = None) -> Iterator[None]:
+    """
+    Keep a job's heartbeat fresh from a background thread while the block runs.
+
+    Handlers only report progress between files, so a single long file would
+    otherwise look like a dead worker to ``requeue_stale_jobs``.
+
+    Args:
+        job (Job): The claimed job
+        interval (float, optional): Seconds between beats. Defaults to ``JOB_HEARTBEAT_INTERVAL``
+    """
+    interval = interval or settings.JOB_HEARTBEAT_INTERVAL
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(interval):
+                if not send_heartbeat(job):
+                    logger.warning(f"Job {job.id} was reclaimed by another worker")
+                    return
+        except Exception:
+            logger.exception(f"Heartbeat for job {job.id} failed")
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f"job-heartbeat-{job.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Return running jobs whose worker stopped reporting to the queue.
+
+    Jobs that already used ``JOB_MAX_ATTEMPTS`` attempts are failed instead.
+
+    Returns:
+        int: Number of jobs requeued or failed
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=stale_before)
+    failed = stale.filter(attempts__gte=settings.JOB_MAX_ATTEMPTS).update(
+        status=Job.STATUS_FAILED, error="Worker stopped responding", finished_at=timezone.now(),
+    )
+    # The next run starts over, so the dead worker's progress and partial results go
+    requeued = stale.update(status=Job.STATUS_PENDING, worker="", completed_items=0, result=None)
+    return failed + requeued
+
+
+def claim_next_job(worker: str) -> Optional[Job]:
+    """
+    Atomically claim the oldest pending job.
+
+    Claiming is a conditional UPDATE on the job's status, so concurrent
+    workers never run the same job, even on SQLite.
+
+    Args:
+        worker (str): Identifier recorded on the claimed job
+
+    Returns:
+        Job: The claimed job, or None when the queue is empty
+    """
+    candidates = Job.objects.filter(status=Job.STATUS_PENDING).order_by("created_at").values_list("pk", flat=True)[:10]
+    for pk in candidates:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def get_job_handler(kind: str) -> Callable[[Job], object]:
+    try:
+        return import_string(settings.JOB_HANDLERS[kind])
+    except KeyError:
+        raise ValueError(f"No handler configured for job kind: {kind}")
+
+
+def run_job(job: Job) -> None:
+    """Run a claimed job with its handler and record the outcome."""
+    logger.info(f"Running job {job.id} ({job.kind})")
+    try:
+        # Bounds how long one job can occupy a worker thread
+        with deadline_scope(deadline_for(f"{job.kind}_job")):
+            result = get_job_handler(job.kind)(job)
+    except Exception as e:
+        logger.exception(f"Job {job.id} failed")
+        _finish_job(job, status=Job.STATUS_FAILED, error=str(e))
+        return
+
+    if _finish_job(job, status=Job.STATUS_SUCCEEDED, result=result, completed_items=F("total_items")):
+        logger.info(f"Job {job.id} succeeded")
+
+
+def _finish_job(job: Job, **update) -> bool:
+    """
+    Record a job's outcome, unless another worker reclaimed it meanwhile.
+
+    Returns:
+        bool: Whether the outcome was recorded
+    """
+    with transaction.atomic():
+        if not _owned(job).update(finished_at=timezone.now(), **update):
+            logger.warning(f"Job {job.id} was reclaimed by another worker; dropping this run's outcome")
+            return False
+        # Uploads are only kept until the job has run, whatever the outcome
+        JobFile.objects.filter(job=job).delete()
+    return True
@@ -0,0 +1,107 @@
+import json
+import multiprocessing
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.pdf_extraction import EXTRACTORS
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 if peak < 1 << 32 else peak / (1024 * 1024)
+
+
+def _run_backend(backend, paths, repeat, results):
+    """Benchmark one backend in a fresh process so peak memory is its own."""
+    try:
+        results.put(_measure_backend(backend, paths, repeat))
+    except Exception as e:
+        results.put({"backend": backend, "error": str(e)})
+
+
+def _measure_backend(backend, paths, repeat):
+    extractor = EXTRACTORS[backend]
+    extractor.version  # Import the library before measuring
+    baseline_rss = _peak_rss_mb()
+
+    tracemalloc.start()
+    pages = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            pages += len(extractor.extract_pages(str(path)))
+    elapsed = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_rss = _peak_rss_mb()
+    return {
+        "backend": backend,
+        "version": extractor.version,
+        "files": len(paths) * repeat,
+        "pages": pages,
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_rss - baseline_rss, 1) if peak_rss is not None else None,
+        "peak_python_mb": round(traced_peak / (1024 * 1024), 1),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compare pages/sec and peak memory of the PDF extraction backends on a local corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("corpus", help="PDF file or directory of PDFs (searched recursively)")
+        parser.add_argument(
+            "--backends", nargs="+", choices=sorted(EXTRACTORS), default=sorted(EXTRACTORS),
+            help="Backends to compare",
+        )
+        parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus per backend")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        corpus = Path(options["corpus"])
+        paths = sorted(corpus.rglob("*.pdf")) if corpus.is_dir() else [corpus]
+        if not paths or not paths[0].exists():
+            raise CommandError(f"No PDF files found at {corpus}")
+
+        self.stdout.write(f"Benchmarking {len(paths)} file(s) x {options['repeat']} pass(es)...")
+        context = multiprocessing.get_context("spawn")
+        results = []
+        for backend in options["backends"]:
+            queue = context.Queue()
+            process = context.Process(target=_run_backend, args=(backend, paths, options["repeat"], queue))
+            process.start()
+            process.join()
+            result = queue.get() if not queue.empty() else {"backend": backend, "error": f"exit code {process.exitcode}"}
+            if "error" in result:
+                self.stderr.write(f"{backend}: {result['error']}")
+            else:
+                results.append(result)
+
+        results.sort(key=lambda result: result["pages_per_sec"] or 0, reverse=True)
+        header = f"{'backend':<12} {'version':<10} {'pages':>7} {'seconds':>9} {'pages/sec':>10} {'peak RSS MB':>12} {'peak py MB':>11}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for result in results:
+            result = {key: "-" if value is None else value for key, value in result.items()}
+            self.stdout.write(
+                f"{result['backend']:<12} {result['version']:<10} {result['pages']:>7} {result['seconds']:>9} "
+                f"{result['pages_per_sec']:>10} {result['peak_rss_mb']:>12} {result['peak_python_mb']:>11}"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
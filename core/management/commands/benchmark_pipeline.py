@@ -0,0 +1,211 @@
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from langchain_core.language_models.chat_models import SimpleChatModel
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.parsers import MultiPartParser
+
+from core.utils.llm_registry import override_llm_factory
+from core.utils.synthetic import FAKE_MEDICATIONS_RESPONSE, FAKE_SUMMARY, canned_response, write_synthetic_pdf
+
+
+class BenchmarkChatModel(SimpleChatModel):
+    """Deterministic stand-in for ChatGroq: canned answers chosen by prompt kind."""
+    model_name: str = "benchmark-fake"
+    max_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+        return canned_response(messages[-1].content)
+
+
+def _fake_llm(**params) -> BenchmarkChatModel:
+    return BenchmarkChatModel(model_name=params["model_name"], max_tokens=params.get("max_tokens"))
+
+
+def _measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "runs": repeat,
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "min_ms": round(samples[0], 3),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time each stage of the report and prescription pipelines offline, on generated PDFs "
+        "and a deterministic fake LLM. Optionally compare against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50], help="Page counts of the generated PDFs")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per stage")
+        parser.add_argument("--seed", type=int, default=1, help="Seed for the generated corpus")
+        parser.add_argument("--corpus-dir", help="Keep the generated PDFs here instead of a temporary directory")
+        parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+        parser.add_argument("--compare", dest="baseline_path", help="Baseline JSON from an earlier run")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Flag stages whose median is this fraction slower than the baseline",
+        )
+        parser.add_argument(
+            "--min-delta-ms", type=float, default=2.0,
+            help="Ignore slowdowns smaller than this many milliseconds, however large relatively",
+        )
+
+    def handle(self, *args, **options):
+        # The analyzers insist on a key even though the fake model never uses it
+        os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = Path(options["corpus_dir"] or tmp)
+            corpus.mkdir(parents=True, exist_ok=True)
+            rng = random.Random(options["seed"])
+            reports, prescriptions = {}, {}
+            for pages in options["pages"]:
+                reports[pages] = corpus / f"report_{pages}p.pdf"
+                prescriptions[pages] = corpus / f"prescription_{pages}p.pdf"
+                write_synthetic_pdf(reports[pages], pages, "report", rng)
+                write_synthetic_pdf(prescriptions[pages], pages, "prescription", rng)
+
+            with override_settings(
+                LLM_RATE_LIMIT_ENABLED=False, EXTRACTION_CACHE_ENABLED=False, SUMMARY_CACHE_ENABLED=False,
+            ), override_llm_factory(_fake_llm):
+                results = self._run(reports, prescriptions, options["repeat"])
+
+        report = {
+            "meta": {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "pages": options["pages"],
+                "repeat": options["repeat"],
+                "seed": options["seed"],
+            },
+            "results": results,
+        }
+        self._print_results(results)
+
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+        if options["baseline_path"]:
+            self._compare(results, options["baseline_path"], options["threshold"], options["min_delta_ms"])
+
+    def _run(self, reports: Dict[int, Path], prescriptions: Dict[int, Path], repeat: int) -> Dict[str, Dict]:
+        from prescription_summarizer.utils.summarize import PrescriptionAnalyzer
+        from report_summarizer.utils.extract_pdf import extract_data_from_medical_report
+        from report_summarizer.utils.summarize_pdf import MedicalReportSummarizer
+
+        summarizer = MedicalReportSummarizer()
+        analyzer = PrescriptionAnalyzer()
+        results = {}
+
+        for pages, path in reports.items():
+            data = path.read_bytes()
+            results[f"extract_report[{pages}p]"] = _measure(
+                lambda: extract_data_from_medical_report(data, path.name), repeat,
+            )
+        for pages, path in prescriptions.items():
+            data = path.read_bytes()
+            results[f"prescription_extract_text[{pages}p]"] = _measure(
+                lambda: analyzer.extract_pdf_text(data), repeat,
+            )
+
+        results["parse_summary"] = _measure(lambda: summarizer._parse_summary(FAKE_SUMMARY), repeat)
+        results["clean_medications_json"] = _measure(
+            lambda: json.loads(analyzer._clean_json_response(FAKE_MEDICATIONS_RESPONSE)), repeat,
+        )
+        prescription_text = analyzer.extract_pdf_text(prescriptions[min(prescriptions)].read_bytes())
+        results["extract_medications[fake-llm]"] = _measure(
+            lambda: analyzer.extract_medications(prescription_text), repeat,
+        )
+        report_text = extract_data_from_medical_report(reports[min(reports)].read_bytes(), "report.pdf")
+        results["summarize[fake-llm]"] = _measure(lambda: summarizer.summarize(report_text), repeat)
+
+        results.update(self._serialization(reports[min(reports)].read_bytes(), summarizer, repeat))
+        return results
+
+    def _serialization(self, pdf: bytes, summarizer, repeat: int) -> Dict[str, Dict]:
+        """Multipart request parsing and JSON response rendering for a ten-file batch."""
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        factory = RequestFactory()
+        files = [SimpleUploadedFile(f"report_{index}.pdf", pdf, "application/pdf") for index in range(10)]
+        body = encode_multipart(BOUNDARY, {"files": files})
+
+        def parse_request():
+            request = factory.generic("POST", "/api/reports/summarize-report/", body, content_type=MULTIPART_CONTENT)
+            return Request(request, parsers=[MultiPartParser()]).FILES.getlist("files")
+
+        summary = summarizer._parse_summary(FAKE_SUMMARY).dict()
+        entries = [{"filename": f"report_{index}.pdf", "summary": summary, "id": index} for index in range(10)]
+        renderer = JSONRenderer()
+        return {
+            "parse_multipart_request[10 files]": _measure(parse_request, repeat),
+            "render_json_response[10 files]": _measure(lambda: renderer.render(entries), repeat),
+        }
+
+    def _print_results(self, results: Dict[str, Dict]) -> None:
+        width = max(len(name) for name in results)
+        self.stdout.write(f"{'stage':<{width}}  {'median ms':>10}  {'p95 ms':>10}  {'mean ms':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<{width}}  {result['median_ms']:>10.3f}  {result['p95_ms']:>10.3f}  {result['mean_ms']:>10.3f}"
+            )
+
+    def _compare(self, results: Dict[str, Dict], baseline_path: str, threshold: float,
+                 min_delta_ms: float) -> None:
+        try:
+            baseline = json.loads(Path(baseline_path).read_text())["results"]
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Cannot read baseline {baseline_path}: {e}")
+
+        regressions = []
+        self.stdout.write(f"\nCompared with {baseline_path} (threshold +{threshold:.0%} and +{min_delta_ms:g} ms):")
+        for name, result in results.items():
+            if name not in baseline:
+                self.stdout.write(f"  {name}: new stage")
+                continue
+            before = baseline[name]["median_ms"]
+            ratio = result["median_ms"] / before if before else 1.0
+            line = f"  {name}: {before:.3f} -> {result['median_ms']:.3f} ms ({ratio - 1:+.0%})"
+            # Sub-millisecond stages jitter by far more than any relative threshold between runs,
+            # so a slowdown has to be large in both relative and absolute terms
+            if ratio > 1 + threshold and result["median_ms"] - before > min_delta_ms:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line + "  REGRESSION"))
+            else:
+                self.stdout.write(line)
+
+        if regressions:
+            raise CommandError(f"{len(regressions)} stage(s) regressed: {', '.join(regressions)}")
+        self.stdout.write(self.style.SUCCESS("No regressions"))
@@ -0,0 +1,220 @@
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.synthetic import canned_response
+
+logger = logging.getLogger(__name__)
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+MODELS_PATH = "/openai/v1/models"
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+
+class FakeGroqBehaviour:
+    """Latency and failure profile of the stub, shared by all handler threads."""
+
+    def __init__(self, latency_ms, distribution, spread, error_rate, rate_limit_rate,
+                 tokens_per_second, seed=None):
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.spread = spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.tokens_per_second = tokens_per_second
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before the response (or the first streamed token)"""
+        with self._lock:
+            if self.distribution == "uniform":
+                latency = self._rng.uniform(self.latency_ms * (1 - self.spread), self.latency_ms * (1 + self.spread))
+            elif self.distribution == "exponential":
+                latency = self._rng.expovariate(1 / self.latency_ms) if self.latency_ms else 0
+            elif self.distribution == "lognormal":
+                # latency_ms is the median; spread is sigma, so the tail grows with it
+                latency = self.latency_ms * self._rng.lognormvariate(0, self.spread)
+            else:
+                latency = self.latency_ms
+        return max(0.0, latency) / 1000
+
+    def sample_failure(self):
+        """An (HTTP status, error type) to answer with, or None for a normal response"""
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.rate_limit_rate:
+            return 429, "rate_limit_exceeded"
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 503, "service_unavailable"
+        return None
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeGroq/1.0"
+
+    @property
+    def behaviour(self) -> FakeGroqBehaviour:
+        return self.server.behaviour
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path.rstrip("/") == MODELS_PATH:
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "fake"}]})
+        else:
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.path.rstrip("/") != COMPLETIONS_PATH:
+            self._send_error(404, "not_found", f"Unknown path {self.path}")
+            return
+        try:
+            payload = json.loads(body or b"{}")
+            prompt = "\n".join(str(message.get("content") or "") for message in payload.get("messages", []))
+        except (ValueError, AttributeError):
+            self._send_error(400, "invalid_request_error", "Request body must be a JSON chat completion request")
+            return
+
+        time.sleep(self.behaviour.sample_latency())
+        failure = self.behaviour.sample_failure()
+        if failure is not None:
+            status, error_type = failure
+            self._send_error(status, error_type, f"Injected {error_type}", retry_after=1 if status == 429 else None)
+            return
+
+        content = canned_response(prompt)
+        model = payload.get("model") or "fake"
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": max(1, len(content) // 4),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if payload.get("stream"):
+            self._stream(model, content, usage)
+        else:
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "logprobs": None,
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+    def _stream(self, model, content, usage):
+        """Send ``content`` as server-sent chunks, word by word at the configured token rate"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        pause = 1 / self.behaviour.tokens_per_second if self.behaviour.tokens_per_second > 0 else 0
+
+        def chunk(delta, finish_reason=None, **extra):
+            event = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+                **extra,
+            }
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            chunk({"role": "assistant", "content": ""})
+            for token in content.split(" "):
+                if pause:
+                    time.sleep(pause)
+                chunk({"content": token + " "})
+            chunk({}, "stop", x_groq={"id": completion_id, "usage": usage})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (deadline or cancelled stream)
+            pass
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, error_type, message, retry_after=None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+        self._send_json(status, {"error": {"message": message, "type": error_type}}, headers)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local OpenAI/Groq-compatible chat completions stub with configurable latency, "
+        "errors and streaming. Point the app at it with LLM_BASE_URL=http://HOST:PORT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=float, default=800, help="Typical (median/mean) response latency")
+        parser.add_argument("--latency-distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+        parser.add_argument(
+            "--latency-spread", type=float, default=0.5,
+            help="Relative half-width for uniform, sigma for lognormal",
+        )
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 503")
+        parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of calls answered with 429")
+        parser.add_argument(
+            "--tokens-per-second", type=float, default=200,
+            help="Streaming pace after the first token; 0 sends everything at once",
+        )
+        parser.add_argument("--seed", type=int, help="Seed for latency and failure sampling")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["error_rate"] + options["rate_limit_rate"] <= 1:
+            raise CommandError("--error-rate plus --rate-limit-rate must be between 0 and 1")
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), FakeGroqHandler)
+        server.daemon_threads = True
+        server.behaviour = FakeGroqBehaviour(
+            latency_ms=options["latency_ms"],
+            distribution=options["latency_distribution"],
+            spread=options["latency_spread"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            tokens_per_second=options["tokens_per_second"],
+            seed=options["seed"],
+        )
+        host, port = server.server_address[:2]
+        self.stdout.write(
+            f"Fake Groq server on http://{host}:{port} "
+            f"({options['latency_distribution']} latency ~{options['latency_ms']:.0f} ms, "
+            f"{options['error_rate']:.0%} errors, {options['rate_limit_rate']:.0%} rate limited). "
+            "Press Ctrl+C to stop."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping.")
+        finally:
+            server.server_close()
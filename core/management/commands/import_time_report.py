@@ -0,0 +1,104 @@
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.prewarm import HEAVY_MODULES
+
+# "import time:       331 |     110934 |         django.core.serializers.json"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Libraries that should only load when a pipeline first runs
+WATCHED_PACKAGES = sorted({module.split(".")[0] for module in HEAVY_MODULES} | {"fitz", "pdfplumber", "pypdfium2"})
+
+
+def _parse_import_times(stderr: str) -> List[Dict]:
+    """Rows of ``python -X importtime`` output as dicts, in import order"""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "depth": (len(match.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what a fresh process imports while Django starts and the URLconf loads, "
+        "using `python -X importtime`, and flag heavy libraries that load before first use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--module", dest="modules", nargs="+",
+            help="Modules to import after django.setup(); defaults to ROOT_URLCONF, which loads every view",
+        )
+        parser.add_argument("--top", type=int, default=15, help="Rows to show in each table")
+        parser.add_argument("--json", dest="json_path", help="Write the summary to this JSON file")
+        parser.add_argument(
+            "--max-ms", type=float,
+            help="Fail when the total import time exceeds this many milliseconds",
+        )
+        parser.add_argument(
+            "--fail-on-heavy", action="store_true",
+            help="Fail when any of the lazily loaded libraries is imported at startup",
+        )
+
+    def handle(self, *args, **options):
+        modules = options["modules"] or [settings.ROOT_URLCONF]
+        code = "import django; django.setup()\n" + "".join(
+            f"import importlib; importlib.import_module({module!r})\n" for module in modules
+        )
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Import failed:\n{result.stderr[-2000:]}")
+
+        rows = _parse_import_times(result.stderr)
+        total_ms = sum(row["self_ms"] for row in rows)
+        packages = defaultdict(float)
+        for row in rows:
+            packages[row["module"].split(".")[0]] += row["self_ms"]
+        heavy = [package for package in WATCHED_PACKAGES if package in packages]
+
+        top = options["top"]
+        self.stdout.write(f"Imported {len(rows)} modules in {total_ms:.0f} ms ({', '.join(modules)})\n")
+        self.stdout.write("Slowest top-level imports (cumulative ms):")
+        for row in sorted((row for row in rows if row["depth"] == 0), key=lambda row: -row["cumulative_ms"])[:top]:
+            self.stdout.write(f"  {row['cumulative_ms']:>9.1f}  {row['module']}")
+        self.stdout.write("\nTime per package (self ms):")
+        for package, self_ms in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f"  {self_ms:>9.1f}  {package}")
+
+        if heavy:
+            self.stdout.write(self.style.WARNING(f"\nHeavy libraries loaded at startup: {', '.join(heavy)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNo heavy libraries loaded at startup"))
+
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps({
+                "modules": modules,
+                "total_ms": round(total_ms, 1),
+                "module_count": len(rows),
+                "heavy_loaded": heavy,
+                "packages_ms": {package: round(self_ms, 1) for package, self_ms in packages.items()},
+            }, indent=2))
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+        if options["fail_on_heavy"] and heavy:
+            raise CommandError(f"Heavy libraries imported at startup: {', '.join(heavy)}")
+        if options["max_ms"] is not None and total_ms > options["max_ms"]:
+            raise CommandError(f"Import time {total_ms:.0f} ms exceeds the {options['max_ms']:.0f} ms budget")
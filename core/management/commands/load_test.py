@@ -0,0 +1,202 @@
+import itertools
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.synthetic import write_synthetic_pdf
+
+# name: (path, multipart field, corpus kind, streams its response)
+ENDPOINTS = {
+    "report": ("/api/reports/summarize-report/", "files", "report", False),
+    "report-events": ("/api/reports/summarize-report/events/", "files", "report", True),
+    "prescription": ("/api/prescription/upload/", "file", "prescription", False),
+}
+
+
+def _batch_errors(entries) -> int:
+    """Files a report batch answered with an error entry instead of a summary"""
+    if not isinstance(entries, list):
+        return 0
+    return sum(
+        1 for entry in entries
+        if isinstance(entry, dict) and str(entry.get("summary", "")).startswith("Error processing file")
+    )
+
+
+def _stream_errors(lines) -> int:
+    """Files a server-sent event stream ended with an ``error`` event; consumes the stream"""
+    return sum(1 for line in lines if line.strip() == "event: error")
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay PDF uploads against a running server at a target concurrency and report "
+        "throughput, p50/p95/p99 latency and error rates per endpoint. Run the server with "
+        "LLM_BASE_URL pointing at `manage.py fake_groq_server` to avoid spending Groq quota."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the server under test")
+        parser.add_argument(
+            "--endpoint", dest="endpoints", nargs="+", choices=sorted(ENDPOINTS), default=["report", "prescription"],
+            help="Endpoints to exercise; requests are spread over them round-robin",
+        )
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+        parser.add_argument("--requests", type=int, default=100, help="Total requests to send")
+        parser.add_argument("--duration", type=float, help="Stop sending new requests after this many seconds")
+        parser.add_argument(
+            "--corpus-dir",
+            help="Directory of PDFs to upload (report*.pdf / prescription*.pdf); generated when omitted",
+        )
+        parser.add_argument("--pages", type=int, default=2, help="Pages per generated PDF")
+        parser.add_argument("--files-per-request", type=int, default=1, help="Files per report upload")
+        parser.add_argument("--token", help="JWT access token, required for the prescription endpoint")
+        parser.add_argument("--timeout", type=float, default=300, help="Client timeout per request in seconds")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", dest="json_path", help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+        if "prescription" in options["endpoints"] and not options["token"]:
+            self.stderr.write("Warning: the prescription endpoint needs --token; expect 401s.")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = self._load_corpus(options["corpus_dir"], Path(tmp), options["pages"], options["seed"])
+            results, elapsed = self._run(corpus, options)
+
+        report = self._summarize(results, elapsed)
+        self._print_report(report, elapsed, options["concurrency"])
+        if options["json_path"]:
+            Path(options["json_path"]).write_text(json.dumps(
+                {"url": options["url"], "concurrency": options["concurrency"], "elapsed_s": round(elapsed, 3),
+                 "endpoints": report},
+                indent=2,
+            ))
+            self.stdout.write(f"Wrote {options['json_path']}")
+
+    def _load_corpus(self, corpus_dir: Optional[str], tmp: Path, pages: int, seed: int) -> Dict[str, List[tuple]]:
+        """(filename, bytes) pairs per corpus kind"""
+        if corpus_dir is None:
+            rng = random.Random(seed)
+            for index in range(5):
+                for kind in ("report", "prescription"):
+                    write_synthetic_pdf(tmp / f"{kind}_{index}.pdf", pages, kind, rng)
+            corpus_dir = tmp
+
+        corpus = {}
+        for kind in ("report", "prescription"):
+            paths = sorted(Path(corpus_dir).glob(f"{kind}*.pdf")) or sorted(Path(corpus_dir).glob("*.pdf"))
+            if not paths:
+                raise CommandError(f"No PDFs found in {corpus_dir}")
+            corpus[kind] = [(path.name, path.read_bytes()) for path in paths]
+        return corpus
+
+    def _run(self, corpus, options):
+        headers = {"Authorization": f"Bearer {options['token']}"} if options["token"] else {}
+        client = httpx.Client(
+            base_url=options["url"], headers=headers, timeout=options["timeout"],
+            limits=httpx.Limits(max_connections=options["concurrency"]),
+        )
+        plan = itertools.islice(itertools.cycle(options["endpoints"]), options["requests"])
+        files = {kind: itertools.cycle(documents) for kind, documents in corpus.items()}
+        plan_lock = threading.Lock()
+        stop_at = time.monotonic() + options["duration"] if options["duration"] else None
+        results = []
+
+        def next_request():
+            with plan_lock:
+                if stop_at is not None and time.monotonic() >= stop_at:
+                    return None
+                endpoint = next(plan, None)
+                if endpoint is None:
+                    return None
+                path, field, kind, streams = ENDPOINTS[endpoint]
+                count = options["files_per_request"] if field == "files" else 1
+                uploads = [(field, (name, data, "application/pdf")) for name, data in
+                           itertools.islice(files[kind], count)]
+            return endpoint, path, streams, uploads
+
+        def worker():
+            while True:
+                request = next_request()
+                if request is None:
+                    return
+                endpoint, path, streams, uploads = request
+                started = time.perf_counter()
+                file_errors = 0
+                try:
+                    # A 200 can still carry per-file failures in its body, so read it before judging
+                    if streams:
+                        with client.stream("POST", path, files=uploads) as response:
+                            file_errors = _stream_errors(response.iter_lines())
+                    else:
+                        response = client.post(path, files=uploads)
+                        if response.status_code < 400:
+                            file_errors = _batch_errors(response.json())
+                    outcome = str(response.status_code)
+                    if response.status_code < 400 and file_errors:
+                        outcome += " with file errors"
+                    ok = response.status_code < 400 and not file_errors
+                except ValueError:
+                    outcome, ok = "invalid JSON", False
+                except httpx.HTTPError as e:
+                    outcome, ok = type(e).__name__, False
+                results.append((endpoint, time.perf_counter() - started, ok, outcome, file_errors))
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["concurrency"], thread_name_prefix="load-test") as executor:
+                for future in [executor.submit(worker) for _ in range(options["concurrency"])]:
+                    future.result()
+        finally:
+            client.close()
+        return results, time.perf_counter() - started
+
+    def _summarize(self, results, elapsed: float) -> Dict[str, Dict]:
+        report = {}
+        for endpoint in sorted({result[0] for result in results}):
+            rows = [result for result in results if result[0] == endpoint]
+            latencies = sorted(row[1] * 1000 for row in rows)
+            errors = sum(1 for row in rows if not row[2])
+            report[endpoint] = {
+                "requests": len(rows),
+                "throughput_rps": round(len(rows) / elapsed, 3) if elapsed else 0.0,
+                "p50_ms": round(_percentile(latencies, 0.50), 1),
+                "p95_ms": round(_percentile(latencies, 0.95), 1),
+                "p99_ms": round(_percentile(latencies, 0.99), 1),
+                "error_rate": round(errors / len(rows), 4),
+                "file_errors": sum(row[4] for row in rows),
+                "outcomes": dict(Counter(row[3] for row in rows)),
+            }
+        return report
+
+    def _print_report(self, report: Dict[str, Dict], elapsed: float, concurrency: int) -> None:
+        total = sum(row["requests"] for row in report.values())
+        self.stdout.write(f"{total} requests in {elapsed:.1f}s at concurrency {concurrency}")
+        width = max([len(name) for name in report] + [len("endpoint")])
+        self.stdout.write(
+            f"{'endpoint':<{width}}  {'requests':>8}  {'req/s':>7}  {'p50 ms':>9}  {'p95 ms':>9}  "
+            f"{'p99 ms':>9}  {'errors':>7}  {'file errs':>9}  outcomes"
+        )
+        for name, row in report.items():
+            outcomes = ", ".join(f"{outcome}: {count}" for outcome, count in sorted(row["outcomes"].items()))
+            self.stdout.write(
+                f"{name:<{width}}  {row['requests']:>8}  {row['throughput_rps']:>7.2f}  {row['p50_ms']:>9.1f}  "
+                f"{row['p95_ms']:>9.1f}  {row['p99_ms']:>9.1f}  {row['error_rate']:>7.1%}  {row['file_errors']:>9}  {outcomes}"
+            )
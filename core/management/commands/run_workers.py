@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core.jobs import claim_next_job, heartbeat, requeue_stale_jobs, run_job, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue (no external broker needed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=settings.JOB_WORKER_CONCURRENCY,
+            help="Jobs run in parallel by this process",
+        )
+        parser.add_argument(
+            "--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL,
+            help="Seconds to wait when the queue is empty",
+        )
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(f"Recovered {requeued} stale job(s).")
+
+        threads = [
+            threading.Thread(target=self.work, args=(options["poll_interval"], options["once"]), daemon=True)
+            for _ in range(max(1, options["concurrency"]))
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {len(threads)} worker thread(s). Press Ctrl+C to stop.")
+
+        try:
+            last_recovery = time.monotonic()
+            while any(thread.is_alive() for thread in threads):
+                # Swept here rather than by the workers, which may all be busy with long jobs
+                if time.monotonic() - last_recovery >= settings.JOB_RECOVERY_INTERVAL:
+                    self.recover()
+                    last_recovery = time.monotonic()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the running jobs finish...")
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+    def recover(self):
+        close_old_connections()
+        try:
+            requeued = requeue_stale_jobs()
+        except Exception:
+            logger.exception("Requeueing stale jobs failed")
+            return
+        if requeued:
+            logger.warning(f"Recovered {requeued} stale job(s)")
+
+    def work(self, poll_interval, once):
+        name = worker_name()
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                job = claim_next_job(name)
+                if job is None:
+                    if once:
+                        return
+                    self.stop.wait(poll_interval)
+                    continue
+
+                with heartbeat(job):
+                    run_job(job)
+        except Exception:
+            logger.exception("Worker thread crashed")
+            raise
+        finally:
+            connections.close_all()
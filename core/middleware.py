@@ -0,0 +1,30 @@
+import time
+
+from .utils.metrics import HTTP_REQUEST_DURATION, collect_server_timings
+
+
+class ServerTimingMiddleware:
+    """
+    Add a ``Server-Timing`` header with the time spent in each pipeline stage.
+
+    Streaming responses only report the stages that ran before the first byte.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_server_timings() as timings:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        HTTP_REQUEST_DURATION.observe(
+            elapsed,
+            route=match.route if match is not None else "unmatched",
+            method=request.method,
+            status=response.status_code,
+        )
+        response["Server-Timing"] = timings.header(total=elapsed)
+        return response
@@ -0,0 +1,76 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class Job(models.Model):
+    """A unit of background work submitted through the job API and run by `manage.py run_workers`."""
+
+    KIND_REPORT_SUMMARY = 'report_summary'
+    KIND_PRESCRIPTION_ANALYSIS = 'prescription_analysis'
+    KIND_CHOICES = [
+        (KIND_REPORT_SUMMARY, 'Report summary'),
+        (KIND_PRESCRIPTION_ANALYSIS, 'Prescription analysis'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE)
+    options = models.JSONField(default=dict, blank=True)
+
+    total_items = models.PositiveIntegerField(default=0)
+    completed_items = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.id} ({self.status})"
+
+
+class JobFile(models.Model):
+    """An uploaded file held for a job until a worker has processed it."""
+    job = models.ForeignKey(Job, related_name='files', on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+    name = models.CharField(max_length=255)
+    content = models.BinaryField()
+
+    class Meta:
+        ordering = ['position']
+
+
+class LLMRateWindow(models.Model):
+    """Requests and estimated tokens admitted to the LLM provider in one rate-limit window."""
+    window_start = models.BigIntegerField(unique=True)
+    requests = models.PositiveIntegerField(default=0)
+    tokens = models.PositiveIntegerField(default=0)
+
+
+class LLMWaiter(models.Model):
+    """A caller queued for LLM admission; expired rows are left behind by crashed workers."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
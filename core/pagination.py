@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on ``created_at``, newest first.
+
+    Each page is an indexed range scan from the cursor position, so listing
+    cost does not grow with the number of rows before it.
+    """
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -0,0 +1,29 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    queued_seconds = serializers.SerializerMethodField()
+    run_seconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'progress', 'result', 'error',
+            'created_at', 'started_at', 'finished_at', 'queued_seconds', 'run_seconds',
+        ]
+
+    def get_progress(self, job):
+        return {"completed": job.completed_items, "total": job.total_items}
+
+    def get_queued_seconds(self, job):
+        if job.started_at is None:
+            return None
+        return round((job.started_at - job.created_at).total_seconds(), 3)
+
+    def get_run_seconds(self, job):
+        if job.started_at is None or job.finished_at is None:
+            return None
+        return round((job.finished_at - job.started_at).total_seconds(), 3)
@@ -0,0 +1,322 @@
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import groq
+import httpx
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.checks import check_job_timing, check_llm_budget
+from core.jobs import claim_next_job, report_progress, requeue_stale_jobs, run_job, send_heartbeat, submit_job
+from core.models import Job, JobFile, LLMWaiter
+from core.utils.admission import LLMAdmissionRejected, acquire, try_acquire
+from core.utils.extraction_cache import ExtractionCache
+from core.utils.resilience import CircuitBreaker, LLMUnavailable, call_with_resilience, get_circuit_breaker
+
+
+def succeed(job):
+    return {"ok": True}
+
+
+def fail(job):
+    raise ValueError("handler failed")
+
+
+def _connection_error():
+    return groq.APIConnectionError(request=httpx.Request("POST", "https://api.groq.com"))
+
+
+def _rate_limit_error():
+    request = httpx.Request("POST", "https://api.groq.com")
+    return groq.RateLimitError("rate limited", response=httpx.Response(429, request=request), body=None)
+
+
+class ExtractionCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_entries_are_kept_per_backend_version(self):
+        cache = ExtractionCache(self.directory, max_entries=10)
+        self.assertIsNone(cache.get("hash", "pymupdf", "1.0"))
+        cache.set("hash", "pymupdf", "1.0", ["page one", "page two"])
+        self.assertEqual(cache.get("hash", "pymupdf", "1.0"), ["page one", "page two"])
+        self.assertIsNone(cache.get("hash", "pymupdf", "1.1"))
+        self.assertIsNone(cache.get("hash", "pdfplumber", "1.0"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ExtractionCache(self.directory, max_entries=2, evict_every=1)
+        cache.set("a", "pymupdf", "1.0", ["a"])
+        cache.set("b", "pymupdf", "1.0", ["b"])
+        os.utime(cache._path("a", "pymupdf", "1.0"), (1000, 1000))
+        os.utime(cache._path("b", "pymupdf", "1.0"), (2000, 2000))
+        # Reading "a" makes "b" the least recently used
+        cache.get("a", "pymupdf", "1.0")
+        cache.set("c", "pymupdf", "1.0", ["c"])
+        self.assertEqual(cache.get("a", "pymupdf", "1.0"), ["a"])
+        self.assertIsNone(cache.get("b", "pymupdf", "1.0"))
+        self.assertEqual(cache.get("c", "pymupdf", "1.0"), ["c"])
+
+    def test_eviction_runs_on_first_write_then_every_few_writes(self):
+        cache = ExtractionCache(self.directory, max_entries=2, evict_every=3)
+        for index in range(5):
+            cache.set(str(index), "pymupdf", "1.0", ["page"])
+        # Swept at writes 1 and 4, so one entry over the limit remains
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+
+class CircuitBreakerTests(TestCase):
+    def test_opens_after_threshold_and_rejects_calls(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(LLMUnavailable):
+            breaker.before_call()
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.before_call())
+        with self.assertRaises(LLMUnavailable):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertFalse(breaker.is_open)
+        self.assertFalse(breaker.before_call())
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker._opened_at -= 60
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(LLMUnavailable):
+            breaker.before_call()
+
+    def test_released_trial_can_be_retried(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.release_trial()
+        self.assertTrue(breaker.before_call())
+
+
+@override_settings(
+    LLM_RETRY_ATTEMPTS=1, LLM_HEDGE_ENABLED=False,
+    LLM_CIRCUIT_FAILURE_THRESHOLD=2, LLM_CIRCUIT_RESET_TIMEOUT=0,
+)
+class CallWithResilienceTests(TestCase):
+    def setUp(self):
+        # Breakers are process-wide per name
+        self.name = f"test-{uuid.uuid4()}"
+
+    def _fail_with(self, error):
+        def call():
+            raise error
+        return call
+
+    def test_connection_errors_open_the_circuit(self):
+        for _ in range(2):
+            with self.assertRaises(LLMUnavailable):
+                call_with_resilience(self.name, self._fail_with(_connection_error()))
+        call = mock.Mock(return_value="ok")
+        self.assertEqual(call_with_resilience(self.name, call), "ok")
+
+    def test_rate_limits_do_not_open_the_circuit(self):
+        for _ in range(3):
+            with self.assertRaises(LLMUnavailable):
+                call_with_resilience(self.name, self._fail_with(_rate_limit_error()))
+        self.assertFalse(get_circuit_breaker(self.name).is_open)
+
+    def test_rejected_admission_does_not_leave_the_trial_stuck(self):
+        for _ in range(2):
+            with self.assertRaises(LLMUnavailable):
+                call_with_resilience(self.name, self._fail_with(_connection_error()))
+
+        def reject():
+            raise LLMAdmissionRejected()
+
+        with self.assertRaises(LLMAdmissionRejected):
+            call_with_resilience(self.name, mock.Mock(), admit=reject)
+        self.assertTrue(get_circuit_breaker(self.name).is_open)
+        self.assertEqual(call_with_resilience(self.name, mock.Mock(return_value="ok")), "ok")
+
+    @override_settings(LLM_CIRCUIT_RESET_TIMEOUT=60)
+    def test_open_circuit_fails_before_admission(self):
+        for _ in range(2):
+            with self.assertRaises(LLMUnavailable):
+                call_with_resilience(self.name, self._fail_with(_connection_error()))
+        admit, call = mock.Mock(), mock.Mock()
+        with self.assertRaises(LLMUnavailable):
+            call_with_resilience(self.name, call, admit=admit)
+        admit.assert_not_called()
+        call.assert_not_called()
+
+
+@override_settings(LLM_RATE_LIMIT_ENABLED=True, LLM_REQUESTS_PER_MINUTE=2, LLM_TOKENS_PER_MINUTE=1000)
+class AdmissionTests(TestCase):
+    def setUp(self):
+        # Keep every call in one rate-limit window
+        patcher = mock.patch("core.utils.admission.time.time", return_value=6000.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_budget(self):
+        acquire(10)
+        acquire(10)
+        with self.assertRaises(LLMAdmissionRejected):
+            acquire(10, max_wait=0)
+
+    def test_token_budget(self):
+        acquire(600)
+        with self.assertRaises(LLMAdmissionRejected):
+            acquire(600, max_wait=0)
+        acquire(400)
+
+    def test_oversized_call_is_capped_to_the_budget(self):
+        acquire(5000)
+        with self.assertRaises(LLMAdmissionRejected):
+            acquire(1, max_wait=0)
+
+    @override_settings(LLM_ADMISSION_MAX_QUEUE=0)
+    def test_rejects_when_the_queue_is_full(self):
+        acquire(1000)
+        with self.assertRaises(LLMAdmissionRejected):
+            acquire(10, max_wait=5)
+
+    def test_try_acquire_never_queues(self):
+        self.assertTrue(try_acquire(600))
+        self.assertFalse(try_acquire(600))
+        self.assertFalse(LLMWaiter.objects.exists())
+
+    @override_settings(LLM_RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        for _ in range(5):
+            acquire(5000, max_wait=0)
+
+
+@override_settings(JOB_HANDLERS={
+    Job.KIND_REPORT_SUMMARY: "core.tests.succeed",
+    Job.KIND_PRESCRIPTION_ANALYSIS: "core.tests.fail",
+})
+class JobQueueTests(TestCase):
+    def _submit(self, kind=Job.KIND_REPORT_SUMMARY):
+        return submit_job(kind, [SimpleUploadedFile("report.pdf", b"%PDF-1.4")])
+
+    def _make_stale(self, job):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+    def test_claims_oldest_pending_job_once(self):
+        first, second = self._submit(), self._submit()
+        claimed = claim_next_job("worker-a")
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertEqual(claimed.status, Job.STATUS_RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertEqual(claim_next_job("worker-b").pk, second.pk)
+        self.assertIsNone(claim_next_job("worker-c"))
+
+    def test_run_job_records_result_and_drops_files(self):
+        self._submit()
+        job = claim_next_job("worker-a")
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_SUCCEEDED)
+        self.assertEqual(job.result, {"ok": True})
+        self.assertFalse(JobFile.objects.filter(job=job).exists())
+
+    def test_failed_job_drops_files(self):
+        self._submit(Job.KIND_PRESCRIPTION_ANALYSIS)
+        job = claim_next_job("worker-a")
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(job.error, "handler failed")
+        self.assertFalse(JobFile.objects.filter(job=job).exists())
+
+    @override_settings(JOB_STALE_AFTER=60, JOB_MAX_ATTEMPTS=2)
+    def test_stale_jobs_are_requeued_then_failed(self):
+        job = self._submit()
+        claimed = claim_next_job("worker-a")
+        report_progress(claimed, result=[{"file": "report.pdf"}])
+        self._make_stale(job)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_PENDING)
+        self.assertEqual(job.completed_items, 0)
+        self.assertIsNone(job.result)
+
+        claim_next_job("worker-b")
+        self._make_stale(job)
+        self.assertEqual(requeue_stale_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+
+    @override_settings(JOB_STALE_AFTER=60)
+    def test_reclaimed_job_ignores_the_old_worker(self):
+        self._submit()
+        stale = claim_next_job("worker-a")
+        self._make_stale(stale)
+        requeue_stale_jobs()
+        current = claim_next_job("worker-b")
+
+        run_job(stale)
+        current.refresh_from_db()
+        self.assertEqual(current.status, Job.STATUS_RUNNING)
+        self.assertEqual(current.worker, "worker-b")
+        self.assertTrue(JobFile.objects.filter(job=current).exists())
+
+    def test_heartbeat_fails_once_reclaimed(self):
+        self._submit()
+        job = claim_next_job("worker-a")
+        self.assertTrue(send_heartbeat(job))
+        Job.objects.filter(pk=job.pk).update(worker="worker-b")
+        self.assertFalse(send_heartbeat(job))
+
+
+class SystemCheckTests(TestCase):
+    def test_default_job_timing_is_valid(self):
+        self.assertEqual(check_job_timing(None), [])
+
+    @override_settings(JOB_HEARTBEAT_INTERVAL=30, JOB_STALE_AFTER=45)
+    def test_stale_after_must_allow_a_late_heartbeat(self):
+        self.assertEqual([error.id for error in check_job_timing(None)], ["core.E002"])
+
+    @override_settings(LLM_RATE_LIMIT_ENABLED=True, REPORT_SUMMARY_CHUNK_TOKENS=11800, LLM_TOKENS_PER_MINUTE=12000)
+    def test_warns_when_a_chunk_call_exceeds_the_token_budget(self):
+        self.assertEqual([message.id for message in check_llm_budget(None)], ["core.W001"])
+
+    @override_settings(LLM_RATE_LIMIT_ENABLED=True, REPORT_SUMMARY_CHUNK_TOKENS=3000, LLM_TOKENS_PER_MINUTE=12000)
+    def test_default_budget_fits_a_chunk_call(self):
+        self.assertEqual(check_llm_budget(None), [])
+
+
+class BenchmarkCompareTests(TestCase):
+    def setUp(self):
+        # Imported here: the command loads LangChain at import time
+        from core.management.commands.benchmark_pipeline import Command
+
+        self.command = Command(stdout=StringIO())
+        baseline = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        self.addCleanup(os.unlink, baseline.name)
+        json.dump({"results": {"tiny": {"median_ms": 0.02}, "slow": {"median_ms": 10.0}}}, baseline)
+        baseline.close()
+        self.baseline = baseline.name
+
+    def test_jitter_on_tiny_stages_is_not_a_regression(self):
+        results = {"tiny": {"median_ms": 0.06}, "slow": {"median_ms": 11.0}}
+        self.command._compare(results, self.baseline, threshold=0.2, min_delta_ms=2.0)
+
+    def test_large_slowdown_is_a_regression(self):
+        results = {"tiny": {"median_ms": 0.02}, "slow": {"median_ms": 15.0}}
+        with self.assertRaisesMessage(CommandError, "1 stage(s) regressed: slow"):
+            self.command._compare(results, self.baseline, threshold=0.2, min_delta_ms=2.0)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import JobDetailView
+
+urlpatterns = [
+    path('<uuid:job_id>/', JobDetailView.as_view(), name='job-detail'),
+]
@@ -0,0 +1,105 @@
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.exceptions import Throttled
+
+from core.models import LLMRateWindow, LLMWaiter
+from core.utils.deadlines import DeadlineExceeded, remaining_time
+from core.utils.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60
+POLL_INTERVAL = 0.5
+
+
+class LLMAdmissionRejected(Throttled):
+    """Raised when the LLM queue is full or a caller waited past its deadline; DRF answers 429."""
+    default_detail = "The language model is at capacity. Please retry later."
+
+
+def _seconds_to_next_window() -> float:
+    return WINDOW_SECONDS - time.time() % WINDOW_SECONDS
+
+
+def _try_admit(tokens: int) -> bool:
+    """Count one request and ``tokens`` against the current window if both budgets allow it."""
+    window_start = int(time.time() // WINDOW_SECONDS) * WINDOW_SECONDS
+    _, created = LLMRateWindow.objects.get_or_create(window_start=window_start)
+    if created:
+        LLMRateWindow.objects.filter(window_start__lt=window_start - 10 * WINDOW_SECONDS).delete()
+
+    # A single conditional UPDATE, so concurrent workers can never overshoot the budgets
+    return LLMRateWindow.objects.filter(
+        window_start=window_start,
+        requests__lt=settings.LLM_REQUESTS_PER_MINUTE,
+        tokens__lte=settings.LLM_TOKENS_PER_MINUTE - tokens,
+    ).update(requests=F("requests") + 1, tokens=F("tokens") + tokens) == 1
+
+
+def try_acquire(estimated_tokens: int) -> bool:
+    """Admit a call only if it fits the budgets right now, without queueing."""
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return True
+    return _try_admit(min(estimated_tokens, settings.LLM_TOKENS_PER_MINUTE))
+
+
+def acquire(estimated_tokens: int, max_wait: float = None) -> None:
+    """
+    Wait until a call of ``estimated_tokens`` fits the provider's rate limits.
+
+    Budgets are ``LLM_REQUESTS_PER_MINUTE`` and ``LLM_TOKENS_PER_MINUTE``,
+    counted in the database so every worker process shares them. Callers
+    that cannot be admitted right away queue for up to ``max_wait`` seconds,
+    or until the request's deadline if that comes first.
+
+    Args:
+        estimated_tokens (int): Prompt plus completion tokens of the call
+        max_wait (float, optional): Seconds to queue. Defaults to ``settings.LLM_ADMISSION_MAX_WAIT``
+
+    Raises:
+        LLMAdmissionRejected: If the queue is full or the wait ran out
+        DeadlineExceeded: If the request's deadline passed while queued
+    """
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return
+
+    # A call larger than the whole budget still has to run eventually
+    tokens = min(estimated_tokens, settings.LLM_TOKENS_PER_MINUTE)
+    if _try_admit(tokens):
+        return
+
+    if max_wait is None:
+        max_wait = settings.LLM_ADMISSION_MAX_WAIT
+    time_left = remaining_time()
+    bounded_by_deadline = time_left is not None and time_left < max_wait
+    if bounded_by_deadline:
+        max_wait = time_left
+    now = timezone.now()
+    LLMWaiter.objects.filter(expires_at__lt=now).delete()
+    if LLMWaiter.objects.count() >= settings.LLM_ADMISSION_MAX_QUEUE:
+        logger.warning("LLM admission queue full, rejecting call")
+        raise LLMAdmissionRejected(wait=_seconds_to_next_window())
+
+    waiter = LLMWaiter.objects.create(expires_at=now + timedelta(seconds=max_wait + WINDOW_SECONDS))
+    wait_until = time.monotonic() + max_wait
+    try:
+        with stage("admission_wait"):
+            while True:
+                remaining = wait_until - time.monotonic()
+                if remaining <= 0:
+                    if bounded_by_deadline:
+                        raise DeadlineExceeded()
+                    logger.warning("LLM admission wait expired, rejecting call")
+                    raise LLMAdmissionRejected(wait=_seconds_to_next_window())
+                # Jitter keeps queued callers from retrying in lockstep
+                time.sleep(min(remaining, POLL_INTERVAL * (0.5 + random.random())))
+                if _try_admit(tokens):
+                    return
+    finally:
+        waiter.delete()
@@ -0,0 +1,106 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional, TypeVar, Union
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(APIException):
+    """Raised when a request's time budget runs out; DRF answers 504."""
+    status_code = 504
+    default_detail = "The request ran out of time."
+    default_code = "deadline_exceeded"
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point in (monotonic) time by which a request must be done."""
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("deadline", default=None)
+
+
+def deadline_for(endpoint: str) -> Optional[Deadline]:
+    """
+    Start the deadline configured for ``endpoint`` in ``settings.REQUEST_DEADLINES``.
+
+    Returns:
+        Optional[Deadline]: None when the endpoint has no (or a zero) budget
+    """
+    seconds = settings.REQUEST_DEADLINES.get(endpoint)
+    return Deadline.after(seconds) if seconds else None
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left before the current deadline, capped at ``default`` when one is given."""
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    if default is None:
+        return deadline.remaining()
+    return min(default, deadline.remaining())
+
+
+def check_deadline() -> None:
+    """Raise ``DeadlineExceeded`` if the current deadline has passed."""
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded()
+
+
+@contextmanager
+def deadline_scope(deadline: Union[Deadline, float, None]) -> Iterator[Optional[Deadline]]:
+    """
+    Make ``deadline`` (or one ``deadline`` seconds from now) current for the block.
+
+    A nested scope can only shorten the budget, never extend an outer one.
+    """
+    if isinstance(deadline, (int, float)):
+        deadline = Deadline.after(deadline)
+    outer = current_deadline()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        yield outer
+        return
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def with_current_context(fn: Callable[..., T]) -> Callable[..., T]:
+    """
+    Wrap ``fn`` so that it runs with the caller's context variables, deadline included.
+
+    ``ThreadPoolExecutor`` does not propagate contextvars; wrap functions
+    before handing them to a pool. Each call runs in its own copy, so the
+    wrapper is safe to use from several threads at once.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs) -> T:
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump when page post-processing changes so older entries are never served
+EXTRACTION_CACHE_VERSION = "1"
+
+
+class ExtractionCache:
+    """
+    Bounded on-disk store of extracted page texts, keyed by upload hash.
+
+    Keys include the extractor backend and its library version, so entries
+    written by another backend or version are never read again and age out
+    through LRU eviction. Reads refresh an entry's mtime. Eviction lists the
+    whole directory, so it runs on the first write of a process and then once
+    every ``evict_every`` writes, trimming the least recently used entries
+    beyond ``max_entries``; between sweeps the cache may overshoot by up to
+    ``evict_every`` entries per process.
+    """
+
+    def __init__(self, directory: str, max_entries: int, evict_every: int = 100):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evict_every = max(1, evict_every)
+        self._lock = threading.Lock()
+        self._writes_since_eviction = self.evict_every
+
+    def _path(self, content_hash: str, backend: str, backend_version: str) -> str:
+        key = hashlib.sha256(
+            f"{EXTRACTION_CACHE_VERSION}:{backend}:{backend_version}:{content_hash}".encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, content_hash: str, backend: str, backend_version: str) -> Optional[List[str]]:
+        """Return the cached pages of an upload, or None."""
+        path = self._path(content_hash, backend, backend_version)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry["pages"]
+
+    def set(self, content_hash: str, backend: str, backend_version: str, pages: List[str]) -> None:
+        """Store the pages of an upload, evicting old entries if needed."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(content_hash, backend, backend_version)
+        entry = {"backend": backend, "backend_version": backend_version, "page_count": len(pages), "pages": pages}
+
+        # Write then rename so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.warning(f"Could not write extraction cache entry {path}")
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+
+        with self._lock:
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction < self.evict_every:
+                return
+            self._writes_since_eviction = 0
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+            except OSError:
+                return
+            excess = len(entries) - self.max_entries
+            if excess <= 0:
+                return
+
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+_cache: Optional[ExtractionCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Return the process-wide extraction cache, or None when disabled."""
+    global _cache
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ExtractionCache(
+                    settings.EXTRACTION_CACHE_DIR, settings.EXTRACTION_CACHE_MAX_ENTRIES,
+                    settings.EXTRACTION_CACHE_EVICT_EVERY,
+                )
+    return _cache
@@ -0,0 +1,121 @@
+import itertools
+import time
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from django.conf import settings
+
+from core.utils.admission import LLMAdmissionRejected, acquire, try_acquire
+from core.utils.deadlines import check_deadline, remaining_time
+from core.utils.metrics import LLM_TOKENS, record_stage, stage
+from core.utils.resilience import LLMUnavailable, call_with_resilience
+from core.utils.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    from langchain.chains import LLMChain
+
+# Errors about the provider rather than the request; callers let these reach the view
+LLM_PROVIDER_ERRORS = (LLMAdmissionRejected, LLMUnavailable)
+
+
+def _estimate_call_tokens(chain: "LLMChain", prompt_text: str) -> int:
+    return estimate_tokens(prompt_text) + (chain.llm.max_tokens or settings.LLM_DEFAULT_COMPLETION_TOKENS)
+
+
+def _record_tokens(model: str, usage: Optional[dict], prompt_text: str, completion: str) -> None:
+    """Count provider-reported token usage, or estimates when the provider sent none."""
+    if usage:
+        input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    else:
+        input_tokens, output_tokens = estimate_tokens(prompt_text), estimate_tokens(completion)
+    LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+
+
+def invoke_chain(chain: "LLMChain", **inputs) -> str:
+    """
+    Run an LLM chain through the shared LLM safeguards.
+
+    Every Groq call in both pipelines goes through here, so admission
+    control, retries, the circuit breaker, hedging and the request deadline
+    apply to all of them. Each HTTP request is given a client timeout of
+    ``LLM_REQUEST_TIMEOUT`` or the time left before the deadline, whichever
+    is shorter.
+
+    Args:
+        chain (LLMChain): Chain from the LLM registry
+        **inputs: Prompt variables
+
+    Returns:
+        str: Raw completion text
+
+    Raises:
+        LLMAdmissionRejected: If the rate budgets stay exhausted
+        LLMUnavailable: If the provider keeps failing
+        DeadlineExceeded: If the request deadline passed
+    """
+    model = chain.llm.model_name
+    prompt_value = chain.prompt.format_prompt(**inputs)
+    prompt_text = prompt_value.to_string()
+    tokens = _estimate_call_tokens(chain, prompt_text)
+
+    def call() -> str:
+        response = chain.llm.invoke(prompt_value, timeout=remaining_time(settings.LLM_REQUEST_TIMEOUT))
+        _record_tokens(model, getattr(response, "usage_metadata", None), prompt_text, response.content)
+        return response.content
+
+    with stage("llm", model):
+        return call_with_resilience(
+            model,
+            call,
+            admit=lambda: acquire(tokens),
+            try_admit=lambda: try_acquire(tokens),
+        )
+
+
+def stream_chain(chain: "LLMChain", **inputs) -> Iterator[str]:
+    """
+    Stream an LLM chain's completion through the shared LLM safeguards.
+
+    Admission control and the circuit breaker apply as for ``invoke_chain``.
+    Retries only cover opening the stream: once the first token has been
+    yielded a failure is raised to the caller. The request deadline is
+    checked between chunks.
+
+    Args:
+        chain (LLMChain): Chain from the LLM registry
+        **inputs: Prompt variables
+
+    Yields:
+        str: Completion text as the provider generates it
+    """
+    model = chain.llm.model_name
+    prompt_value = chain.prompt.format_prompt(**inputs)
+    prompt_text = prompt_value.to_string()
+    tokens = _estimate_call_tokens(chain, prompt_text)
+    started = time.perf_counter()
+
+    def open_stream():
+        chunks = iter(chain.llm.stream(prompt_value, timeout=remaining_time(settings.LLM_REQUEST_TIMEOUT)))
+        # Pull the first chunk so connection errors surface inside the retry loop
+        return next(chunks, None), chunks
+
+    with stage("llm_stream", model):
+        first, chunks = call_with_resilience(
+            model, open_stream, admit=lambda: acquire(tokens), hedge=False,
+        )
+        record_stage("llm_first_token", time.perf_counter() - started, model)
+        if first is None:
+            return
+
+        completion, usage = [], None
+        try:
+            for chunk in itertools.chain([first], chunks):
+                check_deadline()
+                completion.append(chunk.content)
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                yield chunk.content
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+            _record_tokens(model, usage, prompt_text, "".join(completion))
@@ -0,0 +1,152 @@
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+if TYPE_CHECKING:
+    # langchain, langchain_groq and httpx are imported on first use to keep startup fast
+    import httpx
+    from langchain.chains import LLMChain
+    from langchain_core.language_models import BaseChatModel
+    from langchain.prompts import PromptTemplate
+    from langchain_groq import ChatGroq
+
+logger = logging.getLogger(__name__)
+
+LLMKey = Tuple[str, Optional[float], Optional[int], str]
+
+_lock = threading.Lock()
+_http_client: Optional["httpx.Client"] = None
+_llms: Dict[LLMKey, "ChatGroq"] = {}
+_chains: Dict[Tuple[str, LLMKey], "LLMChain"] = {}
+_llm_factory: Optional[Callable[..., "BaseChatModel"]] = None
+
+
+def _get_api_key(api_key: Optional[str] = None) -> str:
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY environment variable not set")
+    return api_key
+
+
+def _get_http_client() -> "httpx.Client":
+    """Return the process-wide keep-alive connection pool. Caller holds ``_lock``."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+def get_llm(model_name: str, temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+            api_key: Optional[str] = None) -> "ChatGroq":
+    """
+    Return the shared ``ChatGroq`` client for a model configuration.
+
+    Clients are created once per (model, temperature, max_tokens) and reuse a
+    pooled keep-alive HTTP connection, so requests skip client setup and the
+    TLS handshake.
+
+    Args:
+        model_name (str): Name of the Groq model to use
+        temperature (float, optional): Sampling temperature. ``None`` keeps the client default
+        max_tokens (int, optional): Completion token limit
+        api_key (str, optional): Groq API key. Defaults to environment variable if None
+
+    Returns:
+        ChatGroq: Long-lived client for the configuration
+    """
+    api_key = _get_api_key(api_key)
+    key = (model_name, temperature, max_tokens, api_key)
+
+    llm = _llms.get(key)
+    if llm is not None:
+        return llm
+
+    with _lock:
+        llm = _llms.get(key)
+        if llm is None:
+            params = {"model_name": model_name, "api_key": api_key, "max_tokens": max_tokens}
+            if temperature is not None:
+                params["temperature"] = temperature
+            if _llm_factory is not None:
+                llm = _llm_factory(**params)
+            else:
+                from langchain_groq import ChatGroq
+
+                if settings.LLM_BASE_URL:
+                    params["base_url"] = settings.LLM_BASE_URL
+                # Retries are handled by core.utils.resilience, not the Groq SDK
+                llm = ChatGroq(http_client=_get_http_client(), max_retries=0, **params)
+            _llms[key] = llm
+            logger.info(f"Created LLM client for {model_name} (temperature={temperature}, max_tokens={max_tokens})")
+    return llm
+
+
+def get_chain(name: str, prompt: "PromptTemplate", model_name: str, temperature: Optional[float] = None,
+              max_tokens: Optional[int] = None, api_key: Optional[str] = None) -> "LLMChain":
+    """
+    Return the shared ``LLMChain`` for a named prompt on a model configuration.
+
+    Args:
+        name (str): Stable identifier of the prompt, e.g. ``"report_summary"``
+        prompt (PromptTemplate): Prompt used when the chain is first created
+        model_name (str): Name of the Groq model to use
+        temperature (float, optional): Sampling temperature
+        max_tokens (int, optional): Completion token limit
+        api_key (str, optional): Groq API key. Defaults to environment variable if None
+
+    Returns:
+        LLMChain: Long-lived chain for the prompt and configuration
+    """
+    llm = get_llm(model_name, temperature, max_tokens, api_key)
+    key = (name, (model_name, temperature, max_tokens, _get_api_key(api_key)))
+
+    chain = _chains.get(key)
+    if chain is not None:
+        return chain
+
+    with _lock:
+        chain = _chains.get(key)
+        if chain is None:
+            from langchain.chains import LLMChain
+
+            chain = LLMChain(llm=llm, prompt=prompt)
+            _chains[key] = chain
+    return chain
+
+
+@contextmanager
+def override_llm_factory(factory: Callable[..., "BaseChatModel"]) -> Iterator[None]:
+    """
+    Build LLM clients with ``factory`` instead of ``ChatGroq`` inside the block.
+
+    Used to run the pipelines offline, e.g. against a deterministic fake
+    model in benchmarks. The factory receives the ``ChatGroq`` keyword
+    arguments and must return a chat model with ``model_name`` and
+    ``max_tokens`` attributes. Clients and chains created inside the block
+    are discarded on exit; objects holding them (summarizers, analyzers)
+    should be created inside the block too.
+    """
+    global _llm_factory
+    with _lock:
+        _llms.clear()
+        _chains.clear()
+        _llm_factory = factory
+    try:
+        yield
+    finally:
+        with _lock:
+            _llms.clear()
+            _chains.clear()
+            _llm_factory = None
@@ -0,0 +1,209 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; spans cache hits through long map-reduce summaries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """Base class of the in-process metrics rendered by ``render_metrics``."""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (the last one is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+_registry: List[Metric] = []
+
+STAGE_DURATION = Histogram(
+    "diagnogenie_stage_duration_seconds",
+    "Time spent in each pipeline stage, by model or extraction backend.",
+    ("stage", "model"),
+)
+STAGE_ERRORS = Counter(
+    "diagnogenie_stage_errors_total",
+    "Pipeline stages that raised, by model or extraction backend.",
+    ("stage", "model"),
+)
+LLM_TOKENS = Counter(
+    "diagnogenie_llm_tokens_total",
+    "LLM tokens sent (input) and generated (output), as reported by the provider or estimated.",
+    ("model", "direction"),
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "diagnogenie_prompt_tokens_saved_total",
+    "Estimated prompt tokens removed by the prompt reducer.",
+)
+CACHE_REQUESTS = Counter(
+    "diagnogenie_cache_requests_total",
+    "Cache lookups by cache and result.",
+    ("cache", "result"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "diagnogenie_http_request_duration_seconds",
+    "Time to produce the response, by route and status code.",
+    ("route", "method", "status"),
+)
+
+
+def render_metrics() -> str:
+    """All metrics of this process in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+class ServerTimings:
+    """Stage durations collected for the current request's ``Server-Timing`` header."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self, total: Optional[float] = None) -> str:
+        """Header value; stages run in parallel threads add up their time."""
+        with self._lock:
+            stages = sorted(self._stages.items())
+        parts = [
+            f'{stage};dur={seconds * 1000:.1f};desc="{count}x"' for stage, (seconds, count) in stages
+        ]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_server_timings: contextvars.ContextVar[Optional[ServerTimings]] = contextvars.ContextVar(
+    "server_timings", default=None,
+)
+
+
+@contextmanager
+def collect_server_timings() -> Iterator[ServerTimings]:
+    """Collect the stages timed inside the block (and in threads that copy its context)."""
+    timings = ServerTimings()
+    token = _server_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _server_timings.reset(token)
+
+
+def record_stage(stage: str, seconds: float, model: str = "") -> None:
+    STAGE_DURATION.observe(seconds, stage=stage, model=model)
+    timings = _server_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def stage(name: str, model: str = "") -> Iterator[None]:
+    """
+    Time a pipeline stage.
+
+    The duration goes to ``diagnogenie_stage_duration_seconds`` and the
+    request's ``Server-Timing`` header; exceptions are counted in
+    ``diagnogenie_stage_errors_total`` and re-raised.
+
+    Args:
+        name (str): Stage name, e.g. ``"extraction"`` or ``"llm"``
+        model (str): Model or extraction backend the stage used
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name, model=model)
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - started, model)
@@ -0,0 +1,292 @@
+import io
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.utils.deadlines import DeadlineExceeded, check_deadline, remaining_time
+from core.utils.extraction_cache import get_extraction_cache
+from core.utils.metrics import CACHE_REQUESTS, stage
+from core.utils.uploads import DocumentSource
+
+logger = logging.getLogger(__name__)
+
+# Separates pages in extracted text so later stages can split on page boundaries
+PAGE_BREAK = "\f"
+
+
+class PdfExtractor:
+    """
+    Common interface for PDF text-extraction backends.
+
+    Backends import their library on first use, so only the configured
+    backend is ever loaded. MuPDF and PDFium are not thread-safe, so their
+    backends run one call at a time per process; large documents get their
+    parallelism from the page-range process pool instead.
+    """
+    name = ""
+    thread_safe = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Library version, used to invalidate cached extractions."""
+        raise NotImplementedError
+
+    def page_count(self, source: DocumentSource) -> int:
+        if self.thread_safe:
+            return self._page_count(source)
+        with self._lock:
+            return self._page_count(source)
+
+    def extract_pages(self, source: DocumentSource, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """
+        Extract the text of pages ``start`` to ``stop`` (exclusive).
+
+        Args:
+            source (DocumentSource): PDF bytes or a path to the PDF
+            start (int): First page index
+            stop (int, optional): Page index to stop before. Defaults to the last page
+
+        Returns:
+            List[str]: Text of each page, in page order
+        """
+        if self.thread_safe:
+            return self._extract_pages(source, start, stop)
+        with self._lock:
+            return self._extract_pages(source, start, stop)
+
+    def _page_count(self, source: DocumentSource) -> int:
+        raise NotImplementedError
+
+    def _extract_pages(self, source: DocumentSource, start: int, stop: Optional[int]) -> List[str]:
+        raise NotImplementedError
+
+
+class PyMuPDFExtractor(PdfExtractor):
+    name = "pymupdf"
+    thread_safe = False
+
+    @property
+    def version(self) -> str:
+        import fitz
+        return fitz.VersionBind
+
+    def _open(self, source: DocumentSource):
+        import fitz
+        if isinstance(source, bytes):
+            return fitz.open(stream=source, filetype="pdf")
+        return fitz.open(source)
+
+    def _page_count(self, source: DocumentSource) -> int:
+        with self._open(source) as doc:
+            return doc.page_count
+
+    def _extract_pages(self, source: DocumentSource, start: int, stop: Optional[int]) -> List[str]:
+        with self._open(source) as doc:
+            stop = doc.page_count if stop is None else min(stop, doc.page_count)
+            pages = []
+            for index in range(start, stop):
+                check_deadline()
+                pages.append(doc.load_page(index).get_text())
+            return pages
+
+
+class PdfplumberExtractor(PdfExtractor):
+    name = "pdfplumber"
+
+    @property
+    def version(self) -> str:
+        import pdfplumber
+        return pdfplumber.__version__
+
+    def _open(self, source: DocumentSource):
+        import pdfplumber
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        return pdfplumber.open(source)
+
+    def _page_count(self, source: DocumentSource) -> int:
+        with self._open(source) as pdf:
+            return len(pdf.pages)
+
+    def _extract_pages(self, source: DocumentSource, start: int, stop: Optional[int]) -> List[str]:
+        with self._open(source) as pdf:
+            pages = []
+            for page in pdf.pages[start:stop]:
+                check_deadline()
+                pages.append(page.extract_text() or "")
+            return pages
+
+
+class PdfiumExtractor(PdfExtractor):
+    name = "pypdfium2"
+    thread_safe = False
+
+    @property
+    def version(self) -> str:
+        import pypdfium2
+        return str(pypdfium2.version.PYPDFIUM_INFO)
+
+    def _open(self, source: DocumentSource):
+        import pypdfium2
+        return pypdfium2.PdfDocument(source)
+
+    def _page_count(self, source: DocumentSource) -> int:
+        pdf = self._open(source)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def _extract_pages(self, source: DocumentSource, start: int, stop: Optional[int]) -> List[str]:
+        pdf = self._open(source)
+        try:
+            stop = len(pdf) if stop is None else min(stop, len(pdf))
+            pages = []
+            for index in range(start, stop):
+                check_deadline()
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    pages.append(textpage.get_text_bounded().replace("\r\n", "\n"))
+                finally:
+                    textpage.close()
+                    page.close()
+            return pages
+        finally:
+            pdf.close()
+
+
+EXTRACTORS: Dict[str, PdfExtractor] = {
+    extractor.name: extractor
+    for extractor in (PyMuPDFExtractor(), PdfplumberExtractor(), PdfiumExtractor())
+}
+
+
+def get_extractor(backend: Optional[str] = None) -> PdfExtractor:
+    """
+    Return the extraction backend named ``backend``.
+
+    Args:
+        backend (str, optional): Backend name. Defaults to ``settings.PDF_EXTRACTION_BACKEND``
+
+    Returns:
+        PdfExtractor: The extraction backend
+    """
+    backend = backend or settings.PDF_EXTRACTION_BACKEND
+    try:
+        return EXTRACTORS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown PDF extraction backend: {backend}. Choose one of: {', '.join(EXTRACTORS)}")
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # Spawned workers don't inherit the web worker's threads and locks
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACTION_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def _reset_process_pool() -> None:
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _extract_page_range(backend: str, source: DocumentSource, start: int, stop: int) -> List[str]:
+    """Process-pool task: open the document independently and extract one page range."""
+    return EXTRACTORS[backend].extract_pages(source, start, stop)
+
+
+def _page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    size = math.ceil(page_count / parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _extract_pages_parallel(extractor: PdfExtractor, source: DocumentSource, page_count: int) -> List[str]:
+    """Split the page range across the process pool and join the results in page order."""
+    ranges = _page_ranges(page_count, settings.PDF_EXTRACTION_PROCESSES)
+    pool = _get_process_pool()
+    futures = [pool.submit(_extract_page_range, extractor.name, source, start, stop) for start, stop in ranges]
+    pages = []
+    try:
+        for future in futures:
+            # Worker processes can't see the request's deadline, so bound the wait here
+            pages.extend(future.result(timeout=remaining_time()))
+    except FutureTimeoutError:
+        for future in futures:
+            future.cancel()
+        raise DeadlineExceeded()
+    return pages
+
+
+def extract_pdf_pages(source: DocumentSource, backend: Optional[str] = None,
+                      content_hash: Optional[str] = None) -> List[str]:
+    """
+    Extract the text of every page with the configured backend.
+
+    Documents with at least ``PDF_PARALLEL_PAGE_THRESHOLD`` pages are split
+    into page ranges that are extracted in parallel worker processes. When
+    ``content_hash`` is given, repeat uploads are served from the extraction
+    cache without parsing the PDF.
+
+    Args:
+        source (DocumentSource): PDF bytes or a path to the PDF
+        backend (str, optional): Backend name. Defaults to ``settings.PDF_EXTRACTION_BACKEND``
+        content_hash (str, optional): SHA-256 of the upload, see ``open_upload``
+
+    Returns:
+        List[str]: Text of each page, in page order
+    """
+    extractor = get_extractor(backend)
+    cache = get_extraction_cache() if content_hash else None
+    if cache is not None:
+        pages = cache.get(content_hash, extractor.name, extractor.version)
+        CACHE_REQUESTS.inc(cache="extraction", result="hit" if pages is not None else "miss")
+        if pages is not None:
+            logger.info(f"Extraction cache hit: {content_hash}")
+            return pages
+
+    with stage("extraction", extractor.name):
+        pages = _extract_pages(extractor, source)
+    if cache is not None:
+        cache.set(content_hash, extractor.name, extractor.version, pages)
+    return pages
+
+
+def _extract_pages(extractor: PdfExtractor, source: DocumentSource) -> List[str]:
+    threshold = settings.PDF_PARALLEL_PAGE_THRESHOLD
+    if threshold and settings.PDF_EXTRACTION_PROCESSES > 1:
+        page_count = extractor.page_count(source)
+        if page_count >= threshold:
+            try:
+                return _extract_pages_parallel(extractor, source, page_count)
+            except BrokenProcessPool:
+                logger.warning("PDF extraction process pool broke, extracting in-process")
+                _reset_process_pool()
+    return extractor.extract_pages(source)
+
+
+def extract_pdf_text(source: DocumentSource, backend: Optional[str] = None,
+                     content_hash: Optional[str] = None) -> str:
+    """Extract the text of a PDF, with pages separated by ``PAGE_BREAK``."""
+    return PAGE_BREAK.join(extract_pdf_pages(source, backend, content_hash))
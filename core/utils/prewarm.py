@@ -0,0 +1,61 @@
+import importlib
+import logging
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Loaded on first use by the pipelines; prewarm() pays for them up front
+HEAVY_MODULES = (
+    "httpx",
+    "tenacity",
+    "groq",
+    "langchain.prompts",
+    "langchain.chains",
+    "langchain_groq",
+    "langchain_text_splitters",
+)
+
+
+def prewarm(build_clients: bool = True) -> float:
+    """
+    Import the heavy LLM and PDF dependencies and optionally build the default clients.
+
+    Call it once per worker process before it takes traffic, e.g. from
+    a gunicorn ``post_worker_init`` hook. The WSGI and ASGI entry points
+    call it when ``LLM_PREWARM`` is set. Failures are logged rather than
+    raised, so a missing API key never stops a worker from starting.
+
+    Args:
+        build_clients (bool): Also create the shared report summarizer and
+            prescription analyzer (needs ``GROQ_API_KEY``)
+
+    Returns:
+        float: Seconds spent warming up
+    """
+    started = time.perf_counter()
+    for module in HEAVY_MODULES:
+        importlib.import_module(module)
+
+    from core.utils.pdf_extraction import get_extractor
+
+    try:
+        # Reading the version imports the configured PDF library
+        get_extractor().version
+    except Exception as e:
+        logger.warning(f"Could not pre-warm PDF backend {settings.PDF_EXTRACTION_BACKEND}: {e}")
+
+    if build_clients:
+        from prescription_summarizer.utils.summarize import get_prescription_analyzer
+        from report_summarizer.utils.summarize_pdf import get_summarizer
+
+        for name, build in (("report summarizer", get_summarizer), ("prescription analyzer", get_prescription_analyzer)):
+            try:
+                build()
+            except Exception as e:
+                logger.warning(f"Could not pre-warm {name}: {e}")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Pre-warmed LLM and PDF dependencies in {elapsed:.2f}s")
+    return elapsed
@@ -0,0 +1,123 @@
+import logging
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Pattern, Tuple
+
+from django.conf import settings
+
+from core.utils.metrics import PROMPT_TOKENS_SAVED, stage
+from core.utils.pdf_extraction import PAGE_BREAK
+from core.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"[ \t\r\v\xa0]+")
+# Lines shorter than this are too generic to treat as page furniture
+MIN_REPEATED_LINE_LENGTH = 4
+
+
+@dataclass
+class ReducedText:
+    """Prompt text after reduction, with the estimated token counts before and after."""
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+@lru_cache(maxsize=None)
+def _compile_patterns(patterns: Tuple[str, ...]) -> List[Pattern]:
+    return [re.compile(pattern, re.IGNORECASE) for pattern in patterns]
+
+
+def _line_key(line: str) -> str:
+    # Exact lines only: lab values that differ by a digit are not page furniture.
+    # Page numbers are left to the boilerplate patterns.
+    return line.lower()
+
+
+def _repeated_lines(pages: List[List[str]]) -> set:
+    """Lines that appear on enough pages to be letterheads, footers or disclaimers."""
+    if len(pages) < 2:
+        return set()
+    page_counts = Counter()
+    for lines in pages:
+        page_counts.update({_line_key(line) for line in lines if len(line) >= MIN_REPEATED_LINE_LENGTH})
+    min_pages = max(2, settings.PROMPT_REPEATED_LINE_MIN_FRACTION * len(pages))
+    return {key for key, count in page_counts.items() if count >= min_pages}
+
+
+def reduce_prompt_pages(pages: List[str], separator: str = PAGE_BREAK) -> ReducedText:
+    """
+    Strip page furniture and boilerplate from extracted pages before an LLM call.
+
+    Lines repeated on at least ``PROMPT_REPEATED_LINE_MIN_FRACTION`` of the
+    pages are kept only where they first appear, lines matching
+    ``PROMPT_BOILERPLATE_PATTERNS`` are dropped, and whitespace is collapsed.
+
+    Args:
+        pages (List[str]): Extracted text of each page
+        separator (str): Joins the reduced pages. Defaults to ``PAGE_BREAK``
+
+    Returns:
+        ReducedText: Reduced text and the tokens saved
+    """
+    with stage("prompt_reduction"):
+        reduced = _reduce_pages(pages, separator)
+    PROMPT_TOKENS_SAVED.inc(reduced.saved_tokens)
+    return reduced
+
+
+def _reduce_pages(pages: List[str], separator: str) -> ReducedText:
+    original_tokens = estimate_tokens(separator.join(pages))
+    if not settings.PROMPT_REDUCER_ENABLED:
+        text = separator.join(pages)
+        return ReducedText(text, original_tokens, original_tokens)
+
+    patterns = _compile_patterns(tuple(settings.PROMPT_BOILERPLATE_PATTERNS))
+    page_lines = [
+        [_SPACES.sub(" ", line).strip() for line in page.split("\n")]
+        for page in pages
+    ]
+    repeated = _repeated_lines(page_lines)
+    seen = set()
+
+    reduced_pages = []
+    for lines in page_lines:
+        kept = []
+        for line in lines:
+            if not line:
+                # Keep single blank lines as paragraph breaks
+                if kept and kept[-1]:
+                    kept.append("")
+                continue
+            key = _line_key(line)
+            if key in repeated:
+                if key in seen:
+                    continue
+                seen.add(key)
+            if any(pattern.search(line) for pattern in patterns):
+                continue
+            kept.append(line)
+        page_text = "\n".join(kept).strip()
+        if page_text:
+            reduced_pages.append(page_text)
+
+    text = separator.join(reduced_pages)
+    reduced = ReducedText(text, original_tokens, estimate_tokens(text))
+    if reduced.saved_tokens:
+        logger.info(
+            f"Prompt reducer saved ~{reduced.saved_tokens} of ~{reduced.original_tokens} tokens "
+            f"({len(repeated)} repeated lines)"
+        )
+    return reduced
+
+
+def reduce_prompt_text(text: str) -> ReducedText:
+    """``reduce_prompt_pages`` for text whose pages are separated by ``PAGE_BREAK``."""
+    return reduce_prompt_pages(text.split(PAGE_BREAK))
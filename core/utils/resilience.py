@@ -0,0 +1,280 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Deque, Dict, Optional, TypeVar
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+
+from core.utils.deadlines import DeadlineExceeded, check_deadline, current_deadline, remaining_time, with_current_context
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LLMUnavailable(APIException):
+    """Raised when the LLM provider keeps failing or its circuit breaker is open; DRF answers 503."""
+    status_code = 503
+    default_detail = "The language model provider is unavailable. Please retry later."
+    default_code = "llm_unavailable"
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Whether a provider error is worth retrying: connection trouble, timeouts, 429s and 5xx."""
+    # Imported here, like tenacity below, so loading this module stays cheap
+    import groq
+    import httpx
+
+    if isinstance(exc, (groq.APIConnectionError, groq.RateLimitError, httpx.TransportError)):
+        return True
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code >= 500
+    return False
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Whether an error says the provider is unhealthy. A 429 means it is up but busy, so it is excluded."""
+    import groq
+
+    return is_transient_error(exc) and not isinstance(exc, groq.RateLimitError)
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a provider is unhealthy.
+
+    After ``failure_threshold`` consecutive transient failures the circuit
+    opens and calls are rejected for ``reset_timeout`` seconds. Then a single
+    trial call is let through: success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def before_call(self) -> bool:
+        """
+        Raise ``LLMUnavailable`` unless the call may go ahead.
+
+        Returns:
+            bool: True if the call is the half-open trial. Its caller must end
+            it with ``record_success``, ``record_failure`` or ``release_trial``.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._trial_in_flight or time.monotonic() - self._opened_at < self.reset_timeout:
+                raise LLMUnavailable()
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self) -> None:
+        """End a trial call that said nothing about the provider, so another call can try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                if not self._trial_in_flight:
+                    logger.warning(f"Circuit for {self.name} opened after {self._failures} failures")
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used to time hedged requests."""
+
+    def __init__(self, size: int = 200):
+        self._lock = threading.Lock()
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < max(1, min_samples):
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+_lock = threading.Lock()
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name, settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_TIMEOUT,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def get_latency_tracker(name: str) -> LatencyTracker:
+    with _lock:
+        tracker = _latencies.get(name)
+        if tracker is None:
+            tracker = _latencies[name] = LatencyTracker()
+        return tracker
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    with _lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=settings.LLM_HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge",
+            )
+        return _hedge_executor
+
+
+def _hedged_call(name: str, call: Callable[[], T], try_admit: Callable[[], bool]) -> T:
+    """Run ``call``; if it outlives the p95 latency, race a duplicate and return the first answer."""
+    delay = get_latency_tracker(name).percentile(0.95, settings.LLM_HEDGE_MIN_SAMPLES)
+    if delay is None:
+        return call()
+
+    executor = _get_hedge_executor()
+    call = with_current_context(call)
+    primary = executor.submit(call)
+    done, _ = wait([primary], timeout=remaining_time(delay))
+    if done or not try_admit():
+        return primary.result()
+
+    logger.info(f"Hedging {name} call after {delay:.2f}s")
+    error = None
+    # The slower request is left to finish in the background; its answer is dropped
+    for future in as_completed([primary, executor.submit(call)]):
+        try:
+            return future.result()
+        except Exception as e:
+            error = e
+    raise error
+
+
+def _backoff():
+    """Jittered exponential backoff that never sleeps past the request deadline."""
+    from tenacity import wait_random_exponential
+
+    jittered = wait_random_exponential(multiplier=0.5, max=settings.LLM_RETRY_BACKOFF_MAX)
+    return lambda retry_state: remaining_time(jittered(retry_state))
+
+
+def call_with_resilience(name: str, call: Callable[[], T], admit: Callable[[], None] = None,
+                         try_admit: Callable[[], bool] = None, hedge: bool = True) -> T:
+    """
+    Run a provider call with retries, a circuit breaker and optional hedging.
+
+    Transient failures are retried with jittered exponential backoff up to
+    ``LLM_RETRY_ATTEMPTS`` attempts. Every attempt first passes ``admit`` so
+    retries count against the rate budgets too. With ``LLM_HEDGE_ENABLED`` a
+    duplicate request is sent once a call outlives the p95 latency, if
+    ``try_admit`` finds budget for it. Attempts and backoff never run past
+    the current request deadline.
+
+    Args:
+        name (str): Provider/model name; breakers and latency stats are per name
+        call (Callable): The request itself
+        admit (Callable, optional): Blocking admission before each attempt
+        try_admit (Callable, optional): Non-blocking admission for a hedged duplicate
+        hedge (bool): False for calls that only open a stream; they are neither
+            hedged nor counted in the latency stats of complete calls
+
+    Returns:
+        The result of ``call``
+
+    Raises:
+        LLMUnavailable: If the circuit is open or transient failures persist
+        DeadlineExceeded: If the request deadline passed
+    """
+    breaker = get_circuit_breaker(name)
+    tracker = get_latency_tracker(name)
+
+    def attempt() -> T:
+        check_deadline()
+        # The breaker goes before admission, so an open circuit fails fast
+        # instead of queueing for and spending rate budget
+        trial = breaker.before_call()
+        if admit is not None:
+            try:
+                admit()
+            except BaseException:
+                # A rejection says nothing about the provider; let another call be the trial
+                if trial:
+                    breaker.release_trial()
+                raise
+        recorded = False
+        started = time.monotonic()
+        try:
+            if hedge and settings.LLM_HEDGE_ENABLED and try_admit is not None:
+                result = _hedged_call(name, call, try_admit)
+            else:
+                result = call()
+        except Exception as e:
+            deadline = current_deadline()
+            if deadline is not None and deadline.expired and not isinstance(e, DeadlineExceeded):
+                # Our own deadline cut the call short; that says nothing about the provider
+                raise DeadlineExceeded() from e
+            if is_provider_failure(e):
+                breaker.record_failure()
+                recorded = True
+            elif not is_transient_error(e) and not isinstance(e, DeadlineExceeded):
+                # The provider answered, so it is healthy even if the request was bad
+                breaker.record_success()
+                recorded = True
+            raise
+        else:
+            breaker.record_success()
+            recorded = True
+        finally:
+            if trial and not recorded:
+                breaker.release_trial()
+        if hedge:
+            tracker.record(time.monotonic() - started)
+        return result
+
+    from tenacity import Retrying, before_sleep_log, retry_if_exception, stop_after_attempt
+
+    retrying = Retrying(
+        stop=stop_after_attempt(settings.LLM_RETRY_ATTEMPTS),
+        wait=_backoff(),
+        retry=retry_if_exception(is_transient_error),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True,
+    )
+    try:
+        return retrying(attempt)
+    except Exception as e:
+        if is_transient_error(e):
+            logger.error(f"{name} call failed after retries: {e}")
+            raise LLMUnavailable() from e
+        raise
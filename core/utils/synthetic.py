@@ -0,0 +1,78 @@
+import json
+import random
+from pathlib import Path
+
+# Canned answers shared by the offline benchmark model and the fake Groq server
+FAKE_SUMMARY = """
+**Overall Condition:**
+The patient is clinically stable with mild anaemia and no acute distress.
+
+**Test Results:**
+Haemoglobin 10.9 g/dL (low), WBC 7.2 x10^9/L, platelets within range.
+Fasting glucose 5.4 mmol/L. Chest X-ray without consolidation.
+
+**Diagnosis:**
+Iron-deficiency anaemia, likely dietary.
+
+**Follow-up:**
+Oral iron supplementation for three months and repeat full blood count in eight weeks.
+"""
+
+FAKE_MEDICATIONS = {
+    "medications": [
+        {"name": "Amoxicillin 500mg", "frequency": "three times daily", "dosage": "1 capsule"},
+        {"name": "Paracetamol 500mg", "frequency": "as needed", "dosage": "2 tablets"},
+        {"name": "Omeprazole 20mg", "frequency": "once daily", "dosage": "1 capsule"},
+    ],
+}
+
+FAKE_MEDICATIONS_RESPONSE = "```json\n" + json.dumps(FAKE_MEDICATIONS, indent=2) + "\n```"
+
+FAKE_PURPOSE = "Used to treat bacterial infections."
+
+LAB_TESTS = ["Haemoglobin", "WBC", "Platelets", "Glucose", "Creatinine", "ALT", "AST", "Sodium", "Potassium"]
+MEDICATIONS = ["Amoxicillin 500mg", "Paracetamol 500mg", "Omeprazole 20mg", "Metformin 850mg", "Atorvastatin 10mg"]
+
+
+def canned_response(prompt: str) -> str:
+    """Answer a pipeline prompt the way the real model would, without calling it"""
+    if "medications" in prompt:
+        return FAKE_MEDICATIONS_RESPONSE
+    if "used for" in prompt:
+        return FAKE_PURPOSE
+    return FAKE_SUMMARY
+
+
+def write_synthetic_pdf(path: Path, pages: int, kind: str, rng: random.Random) -> None:
+    """
+    Write a synthetic report or prescription with a letterhead and footer on every page.
+
+    Args:
+        path (Path): Where to save the PDF
+        pages (int): Number of pages
+        kind (str): ``"report"`` or ``"prescription"``
+        rng (random.Random): Seeded generator, so corpora are reproducible
+    """
+    import fitz
+
+    doc = fitz.open()
+    for number in range(1, pages + 1):
+        lines = ["CITY GENERAL HOSPITAL - Department of Medicine", "12 Harbour Road, Springfield  Tel 555-0100", ""]
+        if kind == "report":
+            lines.append(f"Laboratory report, section {number}")
+            for test in rng.sample(LAB_TESTS, 6):
+                lines.append(f"{test}: {rng.uniform(1, 200):.1f}  (ref {rng.randint(1, 50)}-{rng.randint(60, 250)})")
+            lines.extend([
+                "Clinical notes: patient reports fatigue for two weeks, no fever, appetite reduced.",
+                "Impression: findings consistent with mild iron-deficiency anaemia.",
+            ])
+        else:
+            lines.append("Rx")
+            for medication in rng.sample(MEDICATIONS, 3):
+                lines.append(f"{medication} - {rng.choice(['once', 'twice', 'three times'])} daily for {rng.randint(3, 30)} days")
+        lines.extend(["", "This is a computer generated report and does not require signature.", f"Page {number} of {pages}"])
+
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), "\n".join(lines), fontsize=10)
+    doc.save(str(path))
+    doc.close()
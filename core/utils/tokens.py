@@ -0,0 +1,13 @@
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of LLM tokens in ``text``.
+
+    Uses the usual four-characters-per-token rule of thumb for English text,
+    which is close enough for budgeting without loading a tokenizer.
+    """
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
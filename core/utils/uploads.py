@@ -0,0 +1,66 @@
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Union
+
+from django.conf import settings
+
+from core.utils.metrics import stage
+
+# Extractors accept either the raw document bytes or a path to it on disk
+DocumentSource = Union[bytes, str]
+
+
+@dataclass
+class OpenedUpload:
+    """An upload ready for extraction, with the SHA-256 of its contents."""
+    source: DocumentSource
+    content_hash: str
+
+
+@contextmanager
+def open_upload(file) -> Iterator[OpenedUpload]:
+    """
+    Expose an uploaded file to the extractors without needless disk writes.
+
+    Uploads up to ``UPLOAD_IN_MEMORY_MAX_SIZE`` bytes are exposed as bytes.
+    Uploads Django has already spooled to disk are exposed as that path.
+    Anything else is spilled to a unique temporary file, deleted on exit.
+    The content hash is computed from the same chunk stream.
+
+    Args:
+        file: Django ``UploadedFile`` from ``request.FILES``
+
+    Yields:
+        OpenedUpload: Upload contents as bytes or a path, and their hash
+    """
+    digest = hashlib.sha256()
+
+    if hasattr(file, "temporary_file_path"):
+        with stage("upload"):
+            for chunk in file.chunks():
+                digest.update(chunk)
+        yield OpenedUpload(file.temporary_file_path(), digest.hexdigest())
+        return
+
+    if file.size is not None and file.size <= settings.UPLOAD_IN_MEMORY_MAX_SIZE:
+        chunks = []
+        with stage("upload"):
+            for chunk in file.chunks():
+                digest.update(chunk)
+                chunks.append(chunk)
+        yield OpenedUpload(b"".join(chunks), digest.hexdigest())
+        return
+
+    suffix = os.path.splitext(file.name or "")[-1]
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        with stage("upload"), tmp:
+            for chunk in file.chunks():
+                digest.update(chunk)
+                tmp.write(chunk)
+        yield OpenedUpload(tmp.name, digest.hexdigest())
+    finally:
+        os.unlink(tmp.name)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Job
+from .serializers import JobSerializer
+from .utils.metrics import render_metrics
+
+
+class JobDetailView(APIView):
+    """Poll a background job for progress and results."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        job = get_object_or_404(Job, pk=job_id)
+        # Anonymous jobs are only reachable by their unguessable id
+        if job.user_id is not None and job.user_id != request.user.id:
+            return Response({"detail": "Not found."}, status=404)
+        return Response(JobSerializer(job).data)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for this process's metrics."""
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
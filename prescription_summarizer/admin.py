@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import MedicationPurpose
+
+
+@admin.register(MedicationPurpose)
+class MedicationPurposeAdmin(admin.ModelAdmin):
+    list_display = ('normalized_name', 'name', 'model_name', 'updated_at')
+    search_fields = ('normalized_name', 'name')
+    ordering = ('normalized_name',)
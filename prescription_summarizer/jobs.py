@@ -0,0 +1,23 @@
+from dataclasses import asdict
+
+from core.jobs import job_uploads
+from core.utils.uploads import open_upload
+
+from .models import PrescriptionAnalysis
+from .utils.summarize import get_prescription_analyzer
+
+
+def run_prescription_analysis_job(job):
+    """Analyze a job's prescription with the mode chosen at submission."""
+    pdf_file = job_uploads(job)[0]
+    analyzer = get_prescription_analyzer()
+    with open_upload(pdf_file) as upload:
+        medications = analyzer.analyze_prescription(
+            upload.source, mode=job.options["mode"], content_hash=upload.content_hash
+        )
+    medications = [asdict(medication) for medication in medications]
+    analysis = PrescriptionAnalysis.objects.create(
+        user=job.user, filename=pdf_file.name, content_hash=upload.content_hash,
+        mode=job.options["mode"], medications=medications,
+    )
+    return {"id": analysis.id, "medications": medications}
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from prescription_summarizer.utils.summarize import get_prescription_analyzer
+
+
+class Command(BaseCommand):
+    help = "Pre-warm the medication purpose store from a list of drug names."
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Medication names to warm")
+        parser.add_argument("--file", help="Text file with one medication name per line")
+        parser.add_argument("--refresh", action="store_true", help="Fetch again even if a fresh entry exists")
+        parser.add_argument(
+            "--workers", type=int, default=settings.PRESCRIPTION_PURPOSE_MAX_WORKERS,
+            help="Concurrent LLM lookups",
+        )
+
+    def handle(self, *args, **options):
+        names = list(options["names"])
+        if options["file"]:
+            with open(options["file"], encoding="utf-8") as f:
+                names.extend(line.strip() for line in f)
+        names = list(dict.fromkeys(name for name in names if name))
+        if not names:
+            raise CommandError("Provide medication names or --file.")
+
+        analyzer = get_prescription_analyzer()
+        store = analyzer.purpose_store
+        if not options["refresh"]:
+            names = [name for name in names if not store.is_cached(name)]
+        self.stdout.write(f"Warming {len(names)} medication purposes...")
+
+        def warm(name):
+            try:
+                return analyzer.get_medication_purpose(name, refresh=options["refresh"])
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            for name, purpose in zip(names, executor.map(warm, names)):
+                self.stdout.write(f"{name}: {purpose}")
+
+        self.stdout.write(self.style.SUCCESS("Done."))
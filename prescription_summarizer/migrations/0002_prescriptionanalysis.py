@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('prescription_summarizer', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrescriptionAnalysis',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('mode', models.CharField(max_length=20)),
+                ('medications', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='prescription_analyses', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at'], name='prescriptio_user_id_6400f7_idx'), models.Index(fields=['content_hash'], name='prescriptio_content_c4ffb2_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,34 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class MedicationPurpose(models.Model):
+    """Cached answer to "what is this medication used for", keyed by normalized name."""
+    normalized_name = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255)
+    purpose = models.TextField()
+    model_name = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.normalized_name
+
+
+class PrescriptionAnalysis(models.Model):
+    """An analyzed prescription, kept so users can revisit it without re-uploading."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='prescription_analyses', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    mode = models.CharField(max_length=20)
+    medications = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['content_hash']),
+        ]
+
+    def __str__(self):
+        return self.filename
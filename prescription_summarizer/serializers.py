@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from .models import PrescriptionAnalysis
+
+
+class PrescriptionAnalysisListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PrescriptionAnalysis
+        fields = ['id', 'filename', 'content_hash', 'mode', 'created_at']
+
+
+class PrescriptionAnalysisSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PrescriptionAnalysis
+        fields = ['id', 'filename', 'content_hash', 'mode', 'medications', 'created_at']
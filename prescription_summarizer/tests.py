@@ -1,3 +1,57 @@
+from unittest import mock
+
+from django.db import DatabaseError
 from django.test import TestCase
 
-# Create your tests here.
+from .models import MedicationPurpose
+from .utils.medication_store import MedicationPurposeStore, normalize_medication_name
+
+
+class NormalizeMedicationNameTests(TestCase):
+    def test_strength_and_form_are_dropped(self):
+        for name in ["Amoxicillin 500mg Tab", "amoxicillin", "AMOXICILLIN 0.5 g capsules", "Amoxicillin (500 mg)"]:
+            self.assertEqual(normalize_medication_name(name), "amoxicillin")
+
+    def test_release_form_and_combination(self):
+        self.assertEqual(normalize_medication_name("Metformin 1000 mg XR"), "metformin")
+        self.assertEqual(
+            normalize_medication_name("Amoxicillin/Clavulanate 625mg Tablets"), "amoxicillin clavulanate",
+        )
+
+    def test_name_without_drug_is_empty(self):
+        self.assertEqual(normalize_medication_name("500 mg tab"), "")
+
+
+class MedicationPurposeStoreTests(TestCase):
+    def setUp(self):
+        self.store = MedicationPurposeStore(maxsize=10, ttl=3600)
+        self.fetch = mock.Mock(return_value="Treats bacterial infections")
+
+    def test_fetches_once_per_normalized_name(self):
+        self.assertEqual(self.store.get("Amoxicillin 500mg Tab", self.fetch, "model"), "Treats bacterial infections")
+        self.assertEqual(self.store.get("amoxicillin", self.fetch), "Treats bacterial infections")
+        self.fetch.assert_called_once_with("Amoxicillin 500mg Tab")
+        record = MedicationPurpose.objects.get(normalized_name="amoxicillin")
+        self.assertEqual(record.model_name, "model")
+
+    def test_stored_purposes_are_shared_between_processes(self):
+        self.store.get("Amoxicillin", self.fetch)
+        other = MedicationPurposeStore(maxsize=10, ttl=3600)
+        self.assertTrue(other.is_cached("amoxicillin 250 mg"))
+        self.assertEqual(other.get("amoxicillin", mock.Mock(side_effect=AssertionError)), "Treats bacterial infections")
+
+    def test_stale_entry_is_served_when_refresh_fails(self):
+        self.store.get("Amoxicillin", self.fetch)
+        expired = MedicationPurposeStore(maxsize=10, ttl=0)
+        self.assertEqual(expired.get("Amoxicillin", mock.Mock(side_effect=RuntimeError)), "Treats bacterial infections")
+
+    def test_fetch_error_without_stored_entry_is_raised(self):
+        with self.assertRaises(RuntimeError):
+            self.store.get("Amoxicillin", mock.Mock(side_effect=RuntimeError))
+
+    def test_purpose_is_kept_when_storing_fails(self):
+        with mock.patch.object(MedicationPurpose.objects, "update_or_create", side_effect=DatabaseError("locked")):
+            self.assertEqual(self.store.get("Amoxicillin", self.fetch), "Treats bacterial infections")
+        self.assertFalse(MedicationPurpose.objects.exists())
+        self.assertEqual(self.store.get("Amoxicillin", self.fetch), "Treats bacterial infections")
+        self.fetch.assert_called_once()
@@ -1,7 +1,16 @@
 from django.urls import path
-from .views import *
+from .views import (
+    PrescriptionAnalysisDetailView,
+    PrescriptionAnalysisListView,
+    PrescriptionJobView,
+    PrescriptionUploadView,
+)
 
 urlpatterns = [
+    path('upload/', PrescriptionUploadView.as_view(), name='prescription-upload'),
+    path('upload/jobs/', PrescriptionJobView.as_view(), name='prescription-upload-job'),
+    path('analyses/', PrescriptionAnalysisListView.as_view(), name='prescription-analysis-list'),
+    path('analyses/<int:pk>/', PrescriptionAnalysisDetailView.as_view(), name='prescription-analysis-detail'),
     
     # path('medical_report_summary/', , name='medical_report_summary_generator-page'),
     
@@ -0,0 +1,160 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError
+
+from core.utils.metrics import CACHE_REQUESTS
+from prescription_summarizer.models import MedicationPurpose
+
+logger = logging.getLogger(__name__)
+
+# Strength tokens such as "500mg", "0.5 mg", "10ml", "5%"
+STRENGTH_PATTERN = re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:mg|mcg|µg|ug|g|kg|ml|l|iu|units?|%)(?=\W|$)")
+# Dosage-form and release tokens that do not change what a drug is used for
+FORM_TOKENS = {
+    "tab", "tabs", "tablet", "tablets", "cap", "caps", "capsule", "capsules",
+    "syp", "syrup", "susp", "suspension", "inj", "injection", "sol", "solution",
+    "cream", "ointment", "gel", "drops", "drop", "spray", "inhaler", "patch",
+    "sr", "er", "xr", "cr", "xl", "dr",
+}
+
+
+def normalize_medication_name(name: str) -> str:
+    """
+    Normalize a medication name for purpose lookups.
+
+    "Amoxicillin 500mg Tab" and "amoxicillin" both become "amoxicillin".
+    """
+    name = STRENGTH_PATTERN.sub(" ", name.lower())
+    tokens = re.split(r"[^\w\-]+", name)
+    return " ".join(
+        token for token in tokens
+        if token and token not in FORM_TOKENS and not token.replace(".", "").isdigit()
+    )
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU map."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class MedicationPurposeStore:
+    """
+    Persistent medication purpose store with an in-process LRU in front.
+
+    Lookups go LRU -> database -> LLM. Entries older than
+    ``MEDICATION_PURPOSE_TTL`` seconds are refreshed from the LLM; if the
+    refresh fails the stale answer is served instead.
+    """
+
+    def __init__(self, maxsize: int = None, ttl: int = None):
+        self.ttl = ttl if ttl is not None else settings.MEDICATION_PURPOSE_TTL
+        self._lru = LRUCache(maxsize if maxsize is not None else settings.MEDICATION_PURPOSE_LRU_SIZE)
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl
+
+    def _load(self, key: str) -> Optional[Tuple[str, float]]:
+        entry = self._lru.get(key)
+        if entry is not None:
+            return entry
+
+        record = MedicationPurpose.objects.filter(normalized_name=key).only("purpose", "updated_at").first()
+        if record is None:
+            return None
+
+        entry = (record.purpose, record.updated_at.timestamp())
+        self._lru.set(key, entry)
+        return entry
+
+    def get(self, name: str, fetch: Callable[[str], str], model_name: str = "", refresh: bool = False) -> str:
+        """
+        Return the purpose of ``name``, calling ``fetch`` only when needed.
+
+        Args:
+            name (str): Medication name as written on the prescription
+            fetch (Callable[[str], str]): Asks the LLM for the purpose; may raise
+            model_name (str): Model recorded with newly fetched purposes
+            refresh (bool): Ignore stored answers and fetch again
+
+        Returns:
+            str: Medication purpose
+        """
+        key = normalize_medication_name(name)
+        if not key:
+            return fetch(name)
+
+        entry = None if refresh else self._load(key)
+        if entry is not None and self._is_fresh(entry[1]):
+            CACHE_REQUESTS.inc(cache="medication_purpose", result="hit")
+            return entry[0]
+
+        CACHE_REQUESTS.inc(cache="medication_purpose", result="miss")
+        try:
+            purpose = fetch(name)
+        except Exception:
+            if entry is not None:
+                logger.warning(f"Refreshing purpose for {key} failed, serving stale entry")
+                CACHE_REQUESTS.inc(cache="medication_purpose", result="stale")
+                return entry[0]
+            raise
+
+        self._lru.set(key, (purpose, time.time()))
+        try:
+            MedicationPurpose.objects.update_or_create(
+                normalized_name=key,
+                defaults={"name": name, "purpose": purpose, "model_name": model_name},
+            )
+        except DatabaseError as e:
+            # The answer is already paid for; losing the shared copy only costs a later lookup
+            logger.warning(f"Could not store purpose for {key}: {e}")
+        return purpose
+
+    def is_cached(self, name: str) -> bool:
+        """Whether a fresh purpose for ``name`` is stored."""
+        key = normalize_medication_name(name)
+        if not key:
+            return False
+        entry = self._load(key)
+        return entry is not None and self._is_fresh(entry[1])
+
+
+_store: Optional[MedicationPurposeStore] = None
+_store_lock = threading.Lock()
+
+
+def get_medication_purpose_store() -> MedicationPurposeStore:
+    """Return the process-wide medication purpose store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MedicationPurposeStore()
+    return _store
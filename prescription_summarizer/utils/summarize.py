@@ -1,14 +1,31 @@
-import pdfplumber
 import json
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
-from dataclasses import dataclass
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
+from dataclasses import dataclass, fields
+from django.conf import settings
+from django.db import connections
+from core.utils.admission import LLMAdmissionRejected
+from core.utils.deadlines import DeadlineExceeded, with_current_context
+from core.utils.llm_calls import LLM_PROVIDER_ERRORS, invoke_chain
+from core.utils.llm_registry import get_chain, get_llm
+from core.utils.metrics import stage
+from core.utils.pdf_extraction import extract_pdf_pages
+from core.utils.prompt_reducer import reduce_prompt_pages
+from core.utils.uploads import DocumentSource
+from prescription_summarizer.utils.medication_store import get_medication_purpose_store
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "llama-3.3-70b-versatile"
+
+# "multi": extract medications, then one purpose lookup per medication
+# "single": one structured prompt returns every field, purposes included
+ANALYSIS_MODE_MULTI = "multi"
+ANALYSIS_MODE_SINGLE = "single"
+ANALYSIS_MODES = (ANALYSIS_MODE_MULTI, ANALYSIS_MODE_SINGLE)
 
 
 @dataclass
@@ -18,21 +35,28 @@ class MedicationInfo:
     frequency: str
     dosage: str = ""
     purpose: str = ""
+    # Set when the request deadline passed before the purpose was looked up
+    timed_out: bool = False
 
 
 class PrescriptionAnalyzer:
     """Simple prescription medicine analyzer"""
     
-    def __init__(self, groq_api_key: str = None, model_name: str = "llama-3.3-70b-versatile"):
+    def __init__(self, groq_api_key: str = None, model_name: str = DEFAULT_MODEL_NAME):
         self.groq_api_key = groq_api_key or os.getenv("GROQ_API_KEY")
         if not self.groq_api_key:
             raise ValueError("GROQ_API_KEY must be provided or set as environment variable")
         
-        self.llm = ChatGroq(model=model_name, api_key=self.groq_api_key)
+        self.model_name = model_name
+        self.llm = get_llm(model_name, api_key=self.groq_api_key)
+        self.purpose_store = get_medication_purpose_store()
         self._setup_prompts()
+        self._setup_chains()
     
     def _setup_prompts(self):
         """Setup prompts"""
+        from langchain.prompts import PromptTemplate
+
         self.extract_medication_prompt = PromptTemplate(
             input_variables=["prescription_text"],
             template="""
@@ -48,6 +72,26 @@ Return ONLY valid JSON in this format:
   ]
 }}
 
+Text: {prescription_text}
+"""
+        )
+        
+        self.analyze_prescription_prompt = PromptTemplate(
+            input_variables=["prescription_text"],
+            template="""
+Extract every medication from this prescription text and briefly explain what each one is used for.
+Return ONLY valid JSON in this format:
+{{
+  "medications": [
+    {{
+      "name": "medication name",
+      "dosage": "dosage amount",
+      "frequency": "frequency",
+      "purpose": "what the medication is used for, simple and under 3 sentences"
+    }}
+  ]
+}}
+
 Text: {prescription_text}
 """
         )
@@ -59,75 +103,202 @@ Briefly explain what '{medication_name}' is used for. Keep it simple and under 3
 """
         )
     
-    def extract_pdf_text(self, pdf_path: str) -> Optional[str]:
-        """Extract text from PDF"""
+    def _setup_chains(self):
+        """Fetch shared chains for the prompts from the registry"""
+        self.extract_medication_chain = get_chain(
+            "prescription_extract_medications", self.extract_medication_prompt,
+            self.model_name, api_key=self.groq_api_key,
+        )
+        self.analyze_prescription_chain = get_chain(
+            "prescription_analyze", self.analyze_prescription_prompt,
+            self.model_name, api_key=self.groq_api_key,
+        )
+        self.purpose_chain = get_chain(
+            "prescription_medication_purpose", self.purpose_prompt,
+            self.model_name, api_key=self.groq_api_key,
+        )
+    
+    def extract_pdf_text(self, pdf_source: DocumentSource, content_hash: Optional[str] = None) -> Optional[str]:
+        """Extract text from PDF bytes or a PDF path, without repeated page furniture and boilerplate"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text_content = []
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text and page_text.strip():
-                        text_content.append(page_text.strip())
-                return "\n\n".join(text_content) if text_content else None
+            text_content = [
+                page_text.strip() for page_text in extract_pdf_pages(pdf_source, content_hash=content_hash)
+                if page_text and page_text.strip()
+            ]
+            if not text_content:
+                return None
+            return reduce_prompt_pages(text_content, separator="\n\n").text or "\n\n".join(text_content)
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"PDF extraction error: {e}")
+            logger.error(f"PDF extraction error: {e}")
             return None
     
+    @staticmethod
+    def _clean_json_response(response: str) -> str:
+        """Strip markdown code fences around a JSON response"""
+        response = response.strip()
+        if response.startswith("```json"):
+            response = response[7:-3]
+        elif response.startswith("```"):
+            response = response[3:-3]
+        return response
+    
     def extract_medications(self, prescription_text: str) -> List[Dict[str, str]]:
-        """Extract medications from text"""
+        """Extract medications from text; provider failures raise instead of looking like an empty prescription"""
         try:
-            chain = LLMChain(llm=self.llm, prompt=self.extract_medication_prompt)
-            response = chain.run(prescription_text=prescription_text)
+            response = invoke_chain(self.extract_medication_chain, prescription_text=prescription_text)
             
             # Clean response
-            response = response.strip()
-            if response.startswith("```json"):
-                response = response[7:-3]
-            elif response.startswith("```"):
-                response = response[3:-3]
-            
-            parsed_data = json.loads(response)
-            return parsed_data.get("medications", [])
+            with stage("parse"):
+                response = self._clean_json_response(response)
+                
+                parsed_data = json.loads(response)
+                return parsed_data.get("medications", [])
             
+        except (*LLM_PROVIDER_ERRORS, DeadlineExceeded):
+            raise
         except Exception as e:
-            print(f"Extraction error: {e}")
+            logger.error(f"Extraction error: {e}")
             return []
     
-    def get_medication_purpose(self, medication_name: str) -> str:
-        """Get medication purpose"""
+    def _ask_medication_purpose(self, medication_name: str) -> str:
+        """Ask the LLM what a medication is used for"""
+        return invoke_chain(self.purpose_chain, medication_name=medication_name).strip()
+    
+    def get_medication_purpose(self, medication_name: str, refresh: bool = False) -> str:
+        """Get medication purpose, from the purpose store when possible"""
         try:
-            # chain = self.purpose_prompt | self.llm
-            chain = LLMChain(llm=self.llm, prompt=self.purpose_prompt)
-            return chain.run(medication_name=medication_name).strip()
+            return self.purpose_store.get(
+                medication_name, self._ask_medication_purpose,
+                model_name=self.model_name, refresh=refresh,
+            )
+        except (LLMAdmissionRejected, DeadlineExceeded):
+            raise
         except Exception as e:
+            logger.warning(f"Purpose lookup for {medication_name} failed: {e}")
             return f"Purpose unavailable for {medication_name}"
     
-    def analyze_prescription(self, pdf_path: str) -> List[MedicationInfo]:
+    def _get_medication_purpose_or_none(self, medication_name: str) -> Optional[str]:
+        """Purpose of a medication, or None when the request deadline passed first"""
+        try:
+            return self.get_medication_purpose(medication_name)
+        except DeadlineExceeded:
+            return None
+    
+    def _get_medication_purpose_in_thread(self, medication_name: str) -> Optional[str]:
+        try:
+            return self._get_medication_purpose_or_none(medication_name)
+        finally:
+            # Pool threads open their own database connections; don't leak them
+            connections.close_all()
+    
+    def get_medication_purposes(self, medication_names: List[str], max_workers: int = None) -> Dict[str, Optional[str]]:
+        """Get purposes for several medications concurrently, looking each distinct name up once; None marks a timed-out lookup"""
+        unique_names = list(dict.fromkeys(medication_names))
+        if not unique_names:
+            return {}
+        
+        if max_workers is None:
+            max_workers = settings.PRESCRIPTION_PURPOSE_MAX_WORKERS
+        max_workers = max(1, min(max_workers, len(unique_names)))
+        
+        if max_workers == 1:
+            return {name: self._get_medication_purpose_or_none(name) for name in unique_names}
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="medication-purpose") as executor:
+            # Lookup threads inherit the request deadline
+            lookup = with_current_context(self._get_medication_purpose_in_thread)
+            return dict(zip(unique_names, executor.map(lookup, unique_names)))
+    
+    @staticmethod
+    def parse_medication_infos(response: str) -> List[MedicationInfo]:
+        """Strictly validate a single-call JSON response into MedicationInfo objects"""
+        data = json.loads(PrescriptionAnalyzer._clean_json_response(response))
+        if not isinstance(data, dict) or not isinstance(data.get("medications"), list):
+            raise ValueError("Response must be an object with a 'medications' list")
+        
+        field_names = [field.name for field in fields(MedicationInfo) if field.type is str]
+        medications = []
+        for item in data["medications"]:
+            if not isinstance(item, dict):
+                raise ValueError("Each medication must be an object")
+            
+            values = {}
+            for name in field_names:
+                value = item.get(name)
+                if value is None:
+                    value = ""
+                if not isinstance(value, str):
+                    raise ValueError(f"Medication field '{name}' must be a string")
+                values[name] = value.strip()
+            
+            if not values["name"]:
+                raise ValueError("Medication name is missing")
+            if not values["purpose"]:
+                raise ValueError(f"Purpose is missing for {values['name']}")
+            
+            medications.append(MedicationInfo(**values))
+        
+        return medications
+    
+    def analyze_prescription_text_single(self, prescription_text: str) -> Optional[List[MedicationInfo]]:
+        """Analyze prescription text with one LLM call; None when the response does not validate"""
+        try:
+            response = invoke_chain(self.analyze_prescription_chain, prescription_text=prescription_text)
+            with stage("parse"):
+                return self.parse_medication_infos(response)
+        except (*LLM_PROVIDER_ERRORS, DeadlineExceeded):
+            # The multi-call fallback would hit the same provider trouble
+            raise
+        except Exception as e:
+            logger.warning(f"Single-call analysis error, falling back: {e}")
+            return None
+    
+    def analyze_prescription(self, pdf_source: DocumentSource, max_workers: int = None,
+                             mode: str = ANALYSIS_MODE_MULTI, content_hash: Optional[str] = None) -> List[MedicationInfo]:
         """Analyze prescription and return results"""
+        if mode not in ANALYSIS_MODES:
+            raise ValueError(f"Unknown analysis mode: {mode}")
+        
         # Extract text
-        prescription_text = self.extract_pdf_text(pdf_path)
+        prescription_text = self.extract_pdf_text(pdf_source, content_hash)
         if not prescription_text:
             return []
         
+        if mode == ANALYSIS_MODE_SINGLE:
+            medications = self.analyze_prescription_text_single(prescription_text)
+            if medications is not None:
+                return medications
+        
         # Extract medications
         medications_data = self.extract_medications(prescription_text)
         if not medications_data:
             return []
         
+        medications_data = [
+            med_data for med_data in medications_data
+            if (med_data.get("name") or "").strip()
+        ]
+        
+        # Look up purposes concurrently, once per distinct medication
+        purposes = self.get_medication_purposes(
+            [med_data["name"].strip() for med_data in medications_data],
+            max_workers=max_workers,
+        )
+        
         # Analyze each medication
         analyzed_medications = []
         for med_data in medications_data:
-            med_name = med_data.get("name", "")
-            if not med_name:
-                continue
-            
-            purpose = self.get_medication_purpose(med_name)
+            med_name = med_data["name"].strip()
+            purpose = purposes[med_name]
             
             medication_info = MedicationInfo(
                 name=med_name,
                 frequency=med_data.get("frequency", ""),
                 dosage=med_data.get("dosage", ""),
-                purpose=purpose
+                purpose=purpose or "",
+                timed_out=purpose is None
             )
             
             analyzed_medications.append(medication_info)
@@ -153,6 +324,21 @@ Briefly explain what '{medication_name}' is used for. Keep it simple and under 3
             print()
 
 
+_analyzers: Dict[str, PrescriptionAnalyzer] = {}
+_analyzers_lock = threading.Lock()
+
+
+def get_prescription_analyzer(model_name: str = DEFAULT_MODEL_NAME) -> PrescriptionAnalyzer:
+    """Return the process-wide analyzer for ``model_name``, creating it on first use"""
+    analyzer = _analyzers.get(model_name)
+    if analyzer is None:
+        with _analyzers_lock:
+            analyzer = _analyzers.get(model_name)
+            if analyzer is None:
+                analyzer = _analyzers[model_name] = PrescriptionAnalyzer(model_name=model_name)
+    return analyzer
+
+
 # def main():
 #     """Main function"""
 #     try:
@@ -1,9 +1,35 @@
+from dataclasses import asdict
+
+from django.conf import settings
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+
+from core.jobs import submit_job
+from core.models import Job
+from core.pagination import CreatedAtCursorPagination
+from core.utils.deadlines import DeadlineExceeded, deadline_for, deadline_scope
+from core.utils.llm_calls import LLM_PROVIDER_ERRORS
+from core.utils.uploads import open_upload
+from prescription_summarizer.models import PrescriptionAnalysis
+from prescription_summarizer.serializers import PrescriptionAnalysisListSerializer, PrescriptionAnalysisSerializer
+from prescription_summarizer.utils.summarize import ANALYSIS_MODES, get_prescription_analyzer
+
+def get_analysis_mode(request):
+    """Return the analysis mode requested by the caller, or None if it is unknown."""
+    mode = request.data.get('mode') or request.query_params.get('mode') or settings.PRESCRIPTION_ANALYSIS_MODE
+    return mode if mode in ANALYSIS_MODES else None
+
+
+def unknown_mode_response():
+    return Response(
+        {"error": f"Unknown mode. Choose one of: {', '.join(ANALYSIS_MODES)}."},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
 
-from prescription_summarizer.utils.summarize import PrescriptionAnalyzer
 
 class PrescriptionUploadView(APIView):
     parser_classes = [MultiPartParser, FormParser]
@@ -13,14 +39,67 @@ class PrescriptionUploadView(APIView):
         if not pdf_file:
             return Response({"error": "No PDF file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        with open("temp_prescription.pdf", "wb+") as f:
-            for chunk in pdf_file.chunks():
-                f.write(chunk)
+        mode = get_analysis_mode(request)
+        if mode is None:
+            return unknown_mode_response()
 
-        analyzer = PrescriptionAnalyzer()
         try:
-            medications = analyzer.analyze_prescription("temp_prescription.pdf")
+            analyzer = get_prescription_analyzer()
+            with deadline_scope(deadline_for("prescription_upload")), open_upload(pdf_file) as upload:
+                # Medications whose purpose lookup outlived the deadline come back marked timed_out
+                medications = analyzer.analyze_prescription(
+                    upload.source, mode=mode, content_hash=upload.content_hash
+                )
+        except (*LLM_PROVIDER_ERRORS, DeadlineExceeded):
+            # DRF turns these into 429 with Retry-After, 503 or 504
+            raise
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        return Response({"medications": medications})
+        medications = [asdict(medication) for medication in medications]
+        analysis = PrescriptionAnalysis.objects.create(
+            user=request.user, filename=pdf_file.name, content_hash=upload.content_hash,
+            mode=mode, medications=medications,
+        )
+        return Response({"id": analysis.id, "medications": medications})
+
+
+class PrescriptionJobView(APIView):
+    """Queue prescription analysis as a background job and return its id right away."""
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        pdf_file = request.FILES.get('file')
+        if not pdf_file:
+            return Response({"error": "No PDF file provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        mode = get_analysis_mode(request)
+        if mode is None:
+            return unknown_mode_response()
+
+        job = submit_job(Job.KIND_PRESCRIPTION_ANALYSIS, [pdf_file], user=request.user, options={"mode": mode})
+        return Response(
+            {"job_id": str(job.id), "status": job.status, "status_url": reverse("job-detail", args=[job.id])},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class PrescriptionAnalysisListView(ListAPIView):
+    """The user's saved prescription analyses, newest first, without the medication lists."""
+    serializer_class = PrescriptionAnalysisListSerializer
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = PrescriptionAnalysis.objects.filter(user=self.request.user)
+        content_hash = self.request.query_params.get("content_hash")
+        if content_hash:
+            queryset = queryset.filter(content_hash=content_hash)
+        return queryset.only("id", "filename", "content_hash", "mode", "created_at")
+
+
+class PrescriptionAnalysisDetailView(RetrieveAPIView):
+    """A saved prescription analysis, served without any extraction or LLM work."""
+    serializer_class = PrescriptionAnalysisSerializer
+
+    def get_queryset(self):
+        return PrescriptionAnalysis.objects.filter(user=self.request.user)
@@ -0,0 +1,13 @@
+from core.jobs import job_uploads, report_progress
+
+from .utils.batch import iter_summaries
+
+
+def run_report_summary_job(job):
+    """Summarize a job's reports, publishing each summary as soon as it is ready."""
+    files = job_uploads(job)
+    summaries = [None] * len(files)
+    for index, entry in iter_summaries(files, user=job.user):
+        summaries[index] = entry
+        report_progress(job, result=summaries)
+    return summaries
@@ -1,3 +1,20 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReportSummary(models.Model):
+    """A generated report summary, kept so users can revisit it without re-uploading."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='report_summaries', on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_hash = models.CharField(max_length=64)
+    summary = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['content_hash']),
+        ]
+
+    def __str__(self):
+        return self.filename
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+from .models import ReportSummary
+
+
+class ReportSummaryListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportSummary
+        fields = ['id', 'filename', 'content_hash', 'created_at']
+
+
+class ReportSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReportSummary
+        fields = ['id', 'filename', 'content_hash', 'summary', 'created_at']
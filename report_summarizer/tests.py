@@ -1,3 +1,124 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.utils.admission import LLMAdmissionRejected
+from core.utils.resilience import LLMUnavailable
+
+from .models import ReportSummary
+from .utils.batch import iter_summary_events, summarize_uploads
+from .utils.summarize_pdf import SummarySectionParser
+
+
+SUMMARY_TEXT = (
+    "**Overall Condition:**\nStable, recovering well.\n\n"
+    "**Test Results:**\nHemoglobin 11.2 g/dL,\nslightly low.\n\n"
+    "**Diagnosis:**\nMild anemia.\n\n"
+    "**Follow-up:**\nRepeat CBC in 4 weeks."
+)
+
+
+class SummarySectionParserTests(TestCase):
+    def test_sections_complete_as_the_next_header_arrives(self):
+        parser = SummarySectionParser()
+        completed = []
+        # Split mid-header and mid-line, like streamed tokens
+        for start in range(0, len(SUMMARY_TEXT), 7):
+            completed.extend(parser.feed(SUMMARY_TEXT[start:start + 7]))
+        self.assertEqual([field for field, _ in completed], ["overall_condition", "test_results", "diagnosis"])
+        # The last section has no header after it, so only closing completes it
+        self.assertEqual(parser.close(), [("follow_up", "Repeat CBC in 4 weeks.")])
+
+        summary = parser.summary()
+        self.assertEqual(summary.overall_condition, "Stable, recovering well.")
+        self.assertEqual(summary.test_results, "Hemoglobin 11.2 g/dL, slightly low.")
+        self.assertEqual(summary.diagnosis, "Mild anemia.")
+
+    def test_text_before_the_first_header_is_ignored(self):
+        parser = SummarySectionParser()
+        parser.feed("Here is the summary:\n**Diagnosis:**\nHypertension\n")
+        parser.close()
+        summary = parser.summary()
+        self.assertEqual(summary.diagnosis, "Hypertension")
+        self.assertEqual(summary.overall_condition, "")
+
+    def test_empty_completion(self):
+        parser = SummarySectionParser()
+        self.assertEqual(parser.feed(""), [])
+        self.assertEqual(parser.close(), [])
+
+
+class ReportSummaryListTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(email="patient@example.com", password="pass-1234")
+        other = User.objects.create_user(email="other@example.com", password="pass-1234")
+        for index in range(25):
+            ReportSummary.objects.create(
+                user=self.user, filename=f"report_{index}.pdf", content_hash=f"{index:064d}", summary={},
+            )
+        ReportSummary.objects.create(user=other, filename="other.pdf", content_hash="f" * 64, summary={})
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_pages_cover_every_summary_once(self):
+        response = self.client.get("/api/reports/summaries/")
+        self.assertEqual(response.status_code, 200)
+        first = response.json()
+        self.assertEqual(len(first["results"]), 20)
+        self.assertIsNone(first["previous"])
+        self.assertNotIn("summary", first["results"][0])
+
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(len(second["results"]), 5)
+        self.assertIsNone(second["next"])
+
+        ids = {row["id"] for row in first["results"] + second["results"]}
+        self.assertEqual(ids, set(ReportSummary.objects.filter(user=self.user).values_list("pk", flat=True)))
+
+    def test_page_size_parameter(self):
+        response = self.client.get("/api/reports/summaries/", {"page_size": 10})
+        self.assertEqual(len(response.json()["results"]), 10)
+
+    def test_requires_authentication(self):
+        self.assertEqual(APIClient().get("/api/reports/summaries/").status_code, 401)
+
+
+@override_settings(LLM_CIRCUIT_RESET_TIMEOUT=30)
+class BatchProviderErrorTests(TestCase):
+    def setUp(self):
+        self.files = [SimpleUploadedFile(f"{name}.pdf", name.encode()) for name in ("ok", "busy", "down")]
+        patcher = mock.patch(
+            "report_summarizer.utils.batch.extract_data_from_medical_report",
+            side_effect=lambda source, name, content_hash: name,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _summarize(name):
+        if name == "busy.pdf":
+            raise LLMAdmissionRejected(wait=12)
+        if name == "down.pdf":
+            raise LLMUnavailable()
+        return {"diagnosis": "Mild anemia"}
+
+    def test_provider_errors_only_fail_their_own_file(self):
+        with mock.patch("report_summarizer.utils.batch.summarize_medical_text", side_effect=self._summarize):
+            ok, busy, down = summarize_uploads(self.files, max_workers=3)
+        self.assertEqual(ok["summary"], {"diagnosis": "Mild anemia"})
+        self.assertEqual(busy["retry_after"], 12)
+        self.assertEqual(down["retry_after"], 30)
+
+    def test_streamed_provider_errors_carry_a_retry_hint(self):
+        def stream(raw_text):
+            yield {"event": "summary", "summary": self._summarize(raw_text)}
+
+        with mock.patch("report_summarizer.utils.batch.stream_medical_summary", side_effect=stream):
+            events = {event["filename"]: event for event in iter_summary_events(self.files, max_workers=3)}
+        self.assertEqual(events["ok.pdf"]["event"], "summary")
+        self.assertEqual((events["busy.pdf"]["event"], events["busy.pdf"]["retry_after"]), ("error", 12))
+        self.assertEqual((events["down.pdf"]["event"], events["down.pdf"]["retry_after"]), ("error", 30))
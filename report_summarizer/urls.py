@@ -1,8 +1,21 @@
 from django.urls import path
-from .views import SummarizeReportAPIView, medical_report_summary_generator
+from .views import (
+    ReportSummaryDetailView,
+    ReportSummaryListView,
+    SummarizeReportAPIView,
+    SummarizeReportEventsAPIView,
+    SummarizeReportJobAPIView,
+    SummarizeReportStreamAPIView,
+    medical_report_summary_generator,
+)
 
 urlpatterns = [
     path('summarize-report/', SummarizeReportAPIView.as_view(), name='summarize-report'),
+    path('summarize-report/stream/', SummarizeReportStreamAPIView.as_view(), name='summarize-report-stream'),
+    path('summarize-report/events/', SummarizeReportEventsAPIView.as_view(), name='summarize-report-events'),
+    path('summarize-report/jobs/', SummarizeReportJobAPIView.as_view(), name='summarize-report-job'),
+    path('summaries/', ReportSummaryListView.as_view(), name='report-summary-list'),
+    path('summaries/<int:pk>/', ReportSummaryDetailView.as_view(), name='report-summary-detail'),
     
     path('medical_report_summary/', medical_report_summary_generator, name='medical_report_summary_generator-page'),
     
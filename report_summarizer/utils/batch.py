@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from core.utils.admission import LLMAdmissionRejected
+from core.utils.deadlines import (
+    Deadline, DeadlineExceeded, check_deadline, current_deadline, deadline_scope, with_current_context,
+)
+from core.utils.llm_calls import LLM_PROVIDER_ERRORS
+from core.utils.uploads import open_upload
+
+from report_summarizer.models import ReportSummary
+
+from .extract_pdf import extract_data_from_medical_report
+from .summarize_pdf import stream_medical_summary, summarize_medical_text
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_upload(file, user=None) -> Dict:
+    """
+    Extract and summarize a single uploaded report.
+
+    Errors are caught and reported in the returned entry so that one bad
+    file never fails the rest of the batch. Files the LLM provider could not
+    take (admission rejected or circuit open) carry ``retry_after``, and
+    files still unfinished when the current request deadline passes are
+    marked ``timed_out``. Summaries for authenticated users are saved to
+    their history and the entry carries the saved ``id``.
+
+    Args:
+        file: Django ``UploadedFile`` from ``request.FILES``
+        user: Requesting user; anonymous or None skips saving
+
+    Returns:
+        Dict: ``{"filename": ..., "summary": ...}`` entry for the response
+    """
+    logger.info(f"Processing file: {file.name}")
+    try:
+        check_deadline()
+        with open_upload(file) as upload:
+            raw_text = extract_data_from_medical_report(upload.source, file.name, upload.content_hash)
+        logger.info(f"Text extraction successful for: {file.name}")
+
+        summary = summarize_medical_text(raw_text)
+        logger.info(f"Summarization successful for: {file.name}")
+
+        entry = {
+            "filename": file.name,
+            "summary": summary,
+        }
+        if user is not None and user.is_authenticated:
+            saved = ReportSummary.objects.create(
+                user=user, filename=file.name, content_hash=upload.content_hash, summary=summary,
+            )
+            entry["id"] = saved.id
+        return entry
+
+    except LLM_PROVIDER_ERRORS as e:
+        logger.warning(f"LLM provider could not take {file.name}: {e.detail}")
+        return _rejected_entry(file, e)
+    except DeadlineExceeded as e:
+        logger.warning(f"Deadline passed before {file.name} was summarized")
+        return {
+            "filename": file.name,
+            "summary": f"Error processing file: {e.detail}",
+            "timed_out": True,
+        }
+    except Exception as e:
+        logger.exception(f"Failed to process: {file.name}")
+        return {
+            "filename": file.name,
+            "summary": f"Error processing file: {str(e)}",
+        }
+
+
+def _summarize_upload_in_thread(file, user=None, deadline: Optional[Deadline] = None) -> Dict:
+    try:
+        with deadline_scope(deadline):
+            return summarize_upload(file, user)
+    finally:
+        # Pool threads open their own database connections; don't leak them
+        connections.close_all()
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    """Seconds to wait before retrying a file the LLM provider could not take"""
+    if isinstance(exc, LLMAdmissionRejected):
+        return exc.wait
+    # The circuit is open; it lets a trial call through after the reset timeout
+    return settings.LLM_CIRCUIT_RESET_TIMEOUT
+
+
+def _rejected_entry(file, exc: Exception) -> Dict:
+    return {
+        "filename": file.name,
+        "summary": f"Error processing file: {exc.detail}",
+        "retry_after": _retry_after(exc),
+    }
+
+
+def _worker_count(files: List, max_workers: int = None) -> int:
+    if max_workers is None:
+        max_workers = settings.REPORT_SUMMARY_MAX_WORKERS
+    return max(1, min(max_workers, len(files)))
+
+
+def summarize_uploads(files: Iterable, max_workers: int = None, user=None,
+                      deadline: Optional[Deadline] = None) -> List[Dict]:
+    """
+    Summarize a batch of uploaded reports on a bounded thread pool.
+
+    Extraction and the Groq round-trip are I/O bound, so files are processed
+    concurrently and the batch takes roughly as long as its slowest file.
+
+    Args:
+        files: Uploaded files, in upload order
+        max_workers (int, optional): Worker cap. Defaults to
+            ``settings.REPORT_SUMMARY_MAX_WORKERS``; ``1`` runs sequentially
+        user: Requesting user whose history receives the summaries
+        deadline (Deadline, optional): Budget for the whole batch. Defaults to the current deadline
+
+    Returns:
+        List[Dict]: One entry per file, in upload order; files the LLM
+            provider could not take carry ``retry_after``
+    """
+    files = list(files)
+    max_workers = _worker_count(files, max_workers)
+    deadline = deadline or current_deadline()
+
+    if max_workers == 1:
+        with deadline_scope(deadline):
+            return [summarize_upload(file, user) for file in files]
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-summary") as executor:
+        # map() yields results in submission order, i.e. upload order
+        summarize = with_current_context(_summarize_upload_in_thread)
+        return list(executor.map(lambda file: summarize(file, user, deadline), files))
+
+
+def iter_summaries(files: Iterable, max_workers: int = None, user=None,
+                   deadline: Optional[Deadline] = None) -> Iterator[Tuple[int, Dict]]:
+    """
+    Yield ``(index, entry)`` pairs as soon as each file finishes.
+
+    Args:
+        files: Uploaded files, in upload order
+        max_workers (int, optional): Worker cap, as for ``summarize_uploads``
+        user: Requesting user whose history receives the summaries
+        deadline (Deadline, optional): Budget for the whole batch, as for ``summarize_uploads``
+
+    Yields:
+        Tuple[int, Dict]: Upload index and response entry, in completion order;
+            files the LLM provider could not take carry ``retry_after``
+    """
+    files = list(files)
+    max_workers = _worker_count(files, max_workers)
+    deadline = deadline or current_deadline()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-summary") as executor:
+        # Copying the context lets stage timings reach the request's Server-Timing header
+        summarize = with_current_context(_summarize_upload_in_thread)
+        futures = {
+            executor.submit(summarize, file, user, deadline): index
+            for index, file in enumerate(files)
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+async def aiter_summaries(files: Iterable, max_workers: int = None, user=None,
+                          deadline: Optional[Deadline] = None) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Async counterpart of ``iter_summaries`` for ASGI deployments.
+
+    The stream itself lives on the event loop; only the blocking extraction
+    and LLM work is handed to threads, bounded by the same worker cap.
+
+    Args:
+        files: Uploaded files, in upload order
+        max_workers (int, optional): Worker cap, as for ``summarize_uploads``
+        user: Requesting user whose history receives the summaries
+        deadline (Deadline, optional): Budget for the whole batch, as for ``summarize_uploads``
+
+    Yields:
+        Tuple[int, Dict]: Upload index and response entry, in completion order
+    """
+    files = list(files)
+    semaphore = asyncio.Semaphore(_worker_count(files, max_workers))
+    deadline = deadline or current_deadline()
+    summarize = sync_to_async(_summarize_upload_in_thread, thread_sensitive=False)
+
+    async def run(index: int, file) -> Tuple[int, Dict]:
+        async with semaphore:
+            return index, await summarize(file, user, deadline)
+
+    for next_done in asyncio.as_completed([run(index, file) for index, file in enumerate(files)]):
+        yield await next_done
+
+
+def stream_upload_events(index: int, file, user=None) -> Iterator[Dict]:
+    """
+    Extract and summarize one uploaded report, yielding streaming events.
+
+    Every event carries ``index`` and ``filename``. Token and section events
+    come from ``stream_medical_summary``; the last event is either the saved
+    ``summary`` (with ``id`` for authenticated users) or an ``error``.
+
+    Args:
+        index (int): Upload index of the file
+        file: Django ``UploadedFile`` from ``request.FILES``
+        user: Requesting user; anonymous or None skips saving
+
+    Yields:
+        Dict: Events for this file
+    """
+    base = {"index": index, "filename": file.name}
+    try:
+        check_deadline()
+        with open_upload(file) as upload:
+            raw_text = extract_data_from_medical_report(upload.source, file.name, upload.content_hash)
+
+        summary = None
+        for event in stream_medical_summary(raw_text):
+            if event["event"] == "summary":
+                summary = event["summary"]
+            else:
+                yield {**base, **event}
+
+        final = {**base, "event": "summary", "summary": summary}
+        if user is not None and user.is_authenticated:
+            saved = ReportSummary.objects.create(
+                user=user, filename=file.name, content_hash=upload.content_hash, summary=summary,
+            )
+            final["id"] = saved.id
+        yield final
+
+    except LLM_PROVIDER_ERRORS as e:
+        yield {**base, "event": "error", "error": str(e.detail), "retry_after": _retry_after(e)}
+    except DeadlineExceeded as e:
+        yield {**base, "event": "error", "error": str(e.detail), "timed_out": True}
+    except Exception as e:
+        logger.exception(f"Failed to stream: {file.name}")
+        yield {**base, "event": "error", "error": f"Error processing file: {str(e)}"}
+
+
+def iter_summary_events(files: Iterable, max_workers: int = None, user=None,
+                        deadline: Optional[Deadline] = None) -> Iterator[Dict]:
+    """
+    Stream the events of several uploads at once, interleaved as they happen.
+
+    Files are summarized on a bounded thread pool as in ``iter_summaries``.
+    Closing the iterator (e.g. when the client disconnects) stops the
+    remaining work at its next event.
+
+    Args:
+        files: Uploaded files, in upload order
+        max_workers (int, optional): Worker cap, as for ``summarize_uploads``
+        user: Requesting user whose history receives the summaries
+        deadline (Deadline, optional): Budget for the whole batch, as for ``summarize_uploads``
+
+    Yields:
+        Dict: Events from ``stream_upload_events``
+    """
+    files = list(files)
+    max_workers = _worker_count(files, max_workers)
+    deadline = deadline or current_deadline()
+    events = queue.Queue()
+    stopped = threading.Event()
+
+    def produce(index: int, file) -> None:
+        try:
+            with deadline_scope(deadline):
+                for event in stream_upload_events(index, file, user):
+                    if stopped.is_set():
+                        break
+                    events.put(event)
+        finally:
+            # None marks one finished file
+            events.put(None)
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-stream") as executor:
+        produce = with_current_context(produce)
+        for index, file in enumerate(files):
+            executor.submit(produce, index, file)
+        try:
+            pending = len(files)
+            while pending:
+                event = events.get()
+                if event is None:
+                    pending -= 1
+                else:
+                    yield event
+        finally:
+            stopped.set()
+
+
+async def aiter_summary_events(files: Iterable, max_workers: int = None, user=None,
+                               deadline: Optional[Deadline] = None) -> AsyncIterator[Dict]:
+    """Async counterpart of ``iter_summary_events``; waits for events off the event loop."""
+    events = iter_summary_events(files, max_workers, user, deadline)
+    next_event = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            event = await next_event(events, None)
+            if event is None:
+                return
+            yield event
+    finally:
+        await sync_to_async(events.close, thread_sensitive=False)()
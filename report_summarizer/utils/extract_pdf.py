@@ -1,23 +1,24 @@
-import fitz 
 import os
-from io import BytesIO
+from typing import Optional
+from core.utils.pdf_extraction import PAGE_BREAK, extract_pdf_text
+from core.utils.uploads import DocumentSource
 
-def extract_text_from_pdf(file_path) -> str:
-    text = ""
-    with fitz.open(file_path) as doc:
-        for page in doc:
-            text += page.get_text()
-    return text
+def extract_text_from_pdf(source: DocumentSource, content_hash: Optional[str] = None) -> str:
+    return extract_pdf_text(source, content_hash=content_hash)
 
-def extract_text_from_txt(file_obj) -> str:
-    return file_obj.read().decode('utf-8').strip()
+def extract_text_from_txt(source: DocumentSource) -> str:
+    if isinstance(source, bytes):
+        return source.decode('utf-8').strip()
+    with open(source, 'rb') as file_obj:
+        return file_obj.read().decode('utf-8').strip()
 
-def extract_data_from_medical_report(file_obj, filename: str) -> str:
+def extract_data_from_medical_report(source: DocumentSource, filename: str,
+                                     content_hash: Optional[str] = None) -> str:
     ext = os.path.splitext(filename)[-1].lower()
 
     if ext == ".pdf":
-        return extract_text_from_pdf(file_obj)
+        return extract_text_from_pdf(source, content_hash)
     elif ext == ".txt":
-        return extract_text_from_txt(file_obj)
+        return extract_text_from_txt(source)
     else:
         raise ValueError(f"Unsupported file format: {ext}")
@@ -1,24 +1,42 @@
 import os
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-from typing import Dict, Optional
-from langchain_groq import ChatGroq
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections
+from core.utils.deadlines import with_current_context
+from core.utils.llm_calls import invoke_chain, stream_chain
+from core.utils.llm_registry import get_chain, get_llm
+from core.utils.metrics import stage
+from core.utils.prompt_reducer import reduce_prompt_text
+from core.utils.tokens import estimate_tokens
+from .extract_pdf import PAGE_BREAK
+from .summary_cache import get_cached_summary, store_summary, summary_cache_key
 import warnings
 
+if TYPE_CHECKING:
+    # LangChain is imported on first use so that loading the views stays cheap
+    from langchain.chains import LLMChain
+    from langchain.prompts import PromptTemplate
+    from langchain_groq import ChatGroq
+
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 warnings.filterwarnings("ignore", category=UserWarning)
 logging.getLogger("langchain").setLevel(logging.CRITICAL)
 logging.getLogger("httpx").setLevel(logging.CRITICAL)
 
-load_dotenv() 
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_NAME = "llama-3.3-70b-versatile"
+# Bump whenever the summarization prompt changes so cached summaries are not reused
+PROMPT_VERSION = "1"
+SUMMARY_TEMPERATURE = 0.3  # Lower temperature for more factual output
+SUMMARY_MAX_TOKENS = 1000  # Reasonable limit for summary length
+CHUNK_SUMMARY_MAX_TOKENS = 500  # Per-chunk summaries only need the key facts
+MAX_COLLAPSE_ROUNDS = 3
+
 class MedicalSummary(BaseModel):
     """Pydantic model for structured medical summary output."""
     overall_condition: str = Field(description="Summary of patient's overall condition")
@@ -26,27 +44,129 @@ class MedicalSummary(BaseModel):
     diagnosis: str = Field(description="Diagnosis or clinical impression")
     follow_up: str = Field(description="Recommended follow-up or treatment plan")
 
+# Section headers the prompts ask for, and the MedicalSummary field each fills
+SUMMARY_SECTIONS = {
+    "Overall Condition": "overall_condition",
+    "Test Results": "test_results",
+    "Diagnosis": "diagnosis",
+    "Follow-up": "follow_up",
+}
+
+
+class SummarySectionParser:
+    """
+    Split summary text into ``MedicalSummary`` sections as it streams in.
+
+    A section is complete once the next section header (or the end of the
+    text) arrives, so each one can be shown before the rest is generated.
+    """
+
+    def __init__(self):
+        self.sections = {header: "" for header in SUMMARY_SECTIONS}
+        self._current = None
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Consume more summary text.
+
+        Args:
+            text (str): Next piece of the completion, split anywhere
+
+        Returns:
+            List[Tuple[str, str]]: ``(field, text)`` of each section the text completed
+        """
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        completed = []
+        for line in lines:
+            completed.extend(self._consume_line(line))
+        return completed
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Finish the text and return the sections that were still open."""
+        line, self._buffer = self._buffer, ""
+        completed = self._consume_line(line)
+        if self._current is not None:
+            completed.append(self._section(self._current))
+            self._current = None
+        return completed
+
+    def summary(self) -> "MedicalSummary":
+        return MedicalSummary(**{
+            field: self.sections[header].strip() for header, field in SUMMARY_SECTIONS.items()
+        })
+
+    def _consume_line(self, line: str) -> List[Tuple[str, str]]:
+        line = line.strip()
+        if not line:
+            return []
+        header = next((section for section in SUMMARY_SECTIONS if section in line), None)
+        if header is None:
+            if self._current is not None:
+                self.sections[self._current] += line + " "
+            return []
+        finished, self._current = self._current, header
+        return [self._section(finished)] if finished is not None else []
+
+    def _section(self, header: str) -> Tuple[str, str]:
+        return SUMMARY_SECTIONS[header], self.sections[header].strip()
+
 class MedicalReportSummarizer:
     """Class to handle medical report summarization using LangChain and Groq."""
     
-    def __init__(self, model_name: str = "llama-3.3-70b-versatile", api_key: Optional[str] = None):
+    def __init__(self, model_name: str = DEFAULT_MODEL_NAME, api_key: Optional[str] = None,
+                 temperature: float = SUMMARY_TEMPERATURE, max_tokens: int = SUMMARY_MAX_TOKENS):
         """
         Initialize the summarizer with a specific model and API key.
         
         Args:
             model_name (str): Name of the Groq model to use
             api_key (str, optional): Groq API key. Defaults to environment variable if None
+            temperature (float): Sampling temperature of the LLM
+            max_tokens (int): Completion token limit of the LLM
         """
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("GROQ_API_KEY environment variable not set")
         
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
         self.prompt_template = self._create_prompt_template()
         self.llm = self._initialize_llm(model_name)
         self.chain = self._initialize_chain()
+        self.chunk_prompt_template = self._create_chunk_prompt_template()
+        self.reduce_prompt_template = self._create_reduce_prompt_template()
+        self.chunk_chain = get_chain(
+            "report_summary_chunk",
+            self.chunk_prompt_template,
+            self.model_name,
+            temperature=self.temperature,
+            max_tokens=CHUNK_SUMMARY_MAX_TOKENS,
+            api_key=self.api_key,
+        )
+        self.reduce_chain = get_chain(
+            "report_summary_reduce",
+            self.reduce_prompt_template,
+            self.model_name,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            api_key=self.api_key,
+        )
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-    def _create_prompt_template(self) -> PromptTemplate:
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=settings.REPORT_SUMMARY_CHUNK_TOKENS,
+            chunk_overlap=settings.REPORT_SUMMARY_CHUNK_OVERLAP_TOKENS,
+            length_function=estimate_tokens,
+            separators=[PAGE_BREAK, "\n\n", "\n", ". ", " ", ""],
+        )
+
+    def _create_prompt_template(self) -> "PromptTemplate":
         """Create and return the prompt template for summarization."""
+        from langchain.prompts import PromptTemplate
+
         template = """
         You are an experienced medical assistant tasked with summarizing medical reports.
         Analyze the following patient report and provide a structured summary.
@@ -71,23 +191,82 @@ class MedicalReportSummarizer:
             template=template
         )
 
-    def _initialize_llm(self, model_name: str) -> ChatGroq:
-        """Initialize the Groq LLM with the specified model."""
+    def _create_chunk_prompt_template(self) -> "PromptTemplate":
+        """Create the map prompt that condenses one chunk of a long report."""
+        from langchain.prompts import PromptTemplate
+
+        template = """
+        You are an experienced medical assistant. The following text is part {part} of {total}
+        of a long patient report. Condense it into concise notes for a later structured summary.
+
+        Requirements:
+        - Keep every clinically relevant finding, test value, diagnosis and recommendation
+        - Avoid reproducing protected health information (PHI)
+        - Omit administrative and repeated boilerplate text
+
+        Report excerpt:
+        {report_text}
+
+        Notes:
+        """
+        return PromptTemplate(
+            input_variables=["part", "total", "report_text"],
+            template=template
+        )
+
+    def _create_reduce_prompt_template(self) -> "PromptTemplate":
+        """Create the reduce prompt that merges chunk notes into the final summary."""
+        from langchain.prompts import PromptTemplate
+
+        template = """
+        You are an experienced medical assistant tasked with summarizing medical reports.
+        The following notes were taken from consecutive parts of one long patient report.
+        Combine them into a single structured summary of the whole report.
+
+        Requirements:
+        - Use clear, concise, and professional medical language
+        - Avoid reproducing protected health information (PHI)
+        - Highlight critical findings and recommendations
+        - Structure the response in four sections:
+          1. Overall Condition: General health status of the patient
+          2. Test Results: Key laboratory or imaging findings
+          3. Diagnosis: Primary diagnosis or clinical impression
+          4. Follow-up: Recommended treatments or follow-up actions
+
+        Notes:
+        {partial_summaries}
+
+        Summary (use the specified structure):
+        """
+        return PromptTemplate(
+            input_variables=["partial_summaries"],
+            template=template
+        )
+
+    def _initialize_llm(self, model_name: str) -> "ChatGroq":
+        """Fetch the shared Groq LLM for the specified model from the registry."""
         try:
-            return ChatGroq(
-                model_name=model_name,
+            return get_llm(
+                model_name,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
                 api_key=self.api_key,
-                temperature=0.3,  # Lower temperature for more factual output
-                max_tokens=1000   # Reasonable limit for summary length
             )
         except Exception as e:
             logger.error(f"Failed to initialize LLM: {str(e)}")
             raise
 
-    def _initialize_chain(self) -> LLMChain:
-        """Initialize the LangChain LLMChain."""
+    def _initialize_chain(self) -> "LLMChain":
+        """Fetch the shared LangChain LLMChain from the registry."""
         try:
-            return LLMChain(llm=self.llm, prompt=self.prompt_template)
+            return get_chain(
+                "report_summary",
+                self.prompt_template,
+                self.model_name,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                api_key=self.api_key,
+            )
         except Exception as e:
             logger.error(f"Failed to initialize chain: {str(e)}")
             raise
@@ -111,15 +290,102 @@ class MedicalReportSummarizer:
 
         try:
             # Run the chain to get raw summary
-            raw_summary = self.chain.run(report_text=report_text)
+            chain, inputs = self._summary_request(report_text)
+            raw_summary = invoke_chain(chain, **inputs)
             
             # Parse the raw summary into structured format
-            return self._parse_summary(raw_summary)
+            with stage("parse"):
+                return self._parse_summary(raw_summary)
             
         except Exception as e:
             logger.error(f"Error processing medical report: {str(e)}")
             raise
 
+    def stream(self, report_text: str) -> Iterator[Dict]:
+        """
+        Summarize the medical report, yielding events while the completion streams in.
+
+        Args:
+            report_text (str): The medical report text to summarize
+
+        Yields:
+            Dict: ``{"event": "token", "text": ...}`` per streamed chunk,
+                ``{"event": "section", "field": ..., "text": ...}`` as each
+                ``MedicalSummary`` field completes, and finally
+                ``{"event": "summary", "summary": ...}`` with the whole summary
+
+        Raises:
+            ValueError: If report_text is empty or invalid
+        """
+        if not report_text or not isinstance(report_text, str):
+            raise ValueError("Report text must be a non-empty string")
+
+        chain, inputs = self._summary_request(report_text)
+        parser = SummarySectionParser()
+        for text in stream_chain(chain, **inputs):
+            yield {"event": "token", "text": text}
+            for field, section in parser.feed(text):
+                yield {"event": "section", "field": field, "text": section}
+        for field, section in parser.close():
+            yield {"event": "section", "field": field, "text": section}
+        yield {"event": "summary", "summary": parser.summary().dict()}
+
+    def _summary_request(self, report_text: str) -> Tuple["LLMChain", Dict]:
+        """Pick the final summary chain and its inputs; long reports are condensed first (map-reduce)."""
+        if estimate_tokens(report_text) > settings.REPORT_SUMMARY_INPUT_TOKEN_BUDGET:
+            return self.reduce_chain, {"partial_summaries": self._collapse_notes(report_text)}
+        return self.chain, {"report_text": report_text}
+
+    def _summarize_chunks(self, text: str) -> str:
+        """
+        Split text on page/section boundaries and condense the chunks in parallel.
+
+        Args:
+            text (str): Text larger than the input token budget
+
+        Returns:
+            str: Chunk notes joined in document order
+        """
+        chunks = self.text_splitter.split_text(text)
+        total = len(chunks)
+
+        def summarize_chunk(item):
+            index, chunk = item
+            try:
+                return invoke_chain(self.chunk_chain, part=index + 1, total=total, report_text=chunk).strip()
+            finally:
+                # Pool threads open their own database connections; don't leak them
+                connections.close_all()
+
+        max_workers = max(1, min(settings.REPORT_SUMMARY_MAP_MAX_WORKERS, total))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="report-chunk") as executor:
+            # Chunk threads inherit the request deadline
+            notes = list(executor.map(with_current_context(summarize_chunk), enumerate(chunks)))
+        return "\n\n".join(notes)
+
+    def _collapse_notes(self, report_text: str) -> str:
+        """
+        Condense a report that exceeds the input token budget into notes.
+
+        Chunks are condensed in parallel (map) until the notes fit the budget;
+        the reduce chain then merges them into the four summary sections.
+        Latency grows with the number of rounds rather than with the number
+        of pages.
+
+        Args:
+            report_text (str): The medical report text to summarize
+
+        Returns:
+            str: Notes for the reduce step
+        """
+        notes = report_text
+        for round_number in range(1, MAX_COLLAPSE_ROUNDS + 1):
+            notes = self._summarize_chunks(notes)
+            logger.info(f"Map round {round_number}: notes at ~{estimate_tokens(notes)} tokens")
+            if estimate_tokens(notes) <= settings.REPORT_SUMMARY_INPUT_TOKEN_BUDGET:
+                break
+        return notes
+
     def _parse_summary(self, raw_summary: str) -> MedicalSummary:
         """
         Parse raw summary text into structured MedicalSummary object.
@@ -132,38 +398,46 @@ class MedicalReportSummarizer:
         """
         try:
             # Split the summary into sections based on expected headers
-            sections = {
-                "Overall Condition": "",
-                "Test Results": "",
-                "Diagnosis": "",
-                "Follow-up": ""
-            }
-            
-            current_section = None
-            for line in raw_summary.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                if any(section in line for section in sections.keys()):
-                    current_section = next(section for section in sections.keys() if section in line)
-                elif current_section:
-                    sections[current_section] += line + " "
+            parser = SummarySectionParser()
+            parser.feed(raw_summary)
+            parser.close()
 
             # Create structured output
-            return MedicalSummary(
-                overall_condition=sections["Overall Condition"].strip(),
-                test_results=sections["Test Results"].strip(),
-                diagnosis=sections["Diagnosis"].strip(),
-                follow_up=sections["Follow-up"].strip()
-            )
+            return parser.summary()
         except Exception as e:
             logger.error(f"Error parsing summary: {str(e)}")
             raise
 
-def summarize_medical_text(report_text: str, model_name: str = "llama-3.3-70b-versatile") -> Dict:
+_summarizers: Dict[str, MedicalReportSummarizer] = {}
+_summarizers_lock = threading.Lock()
+
+
+def get_summarizer(model_name: str = DEFAULT_MODEL_NAME) -> MedicalReportSummarizer:
+    """Return the process-wide summarizer for ``model_name``, creating it on first use."""
+    summarizer = _summarizers.get(model_name)
+    if summarizer is None:
+        with _summarizers_lock:
+            summarizer = _summarizers.get(model_name)
+            if summarizer is None:
+                summarizer = _summarizers[model_name] = MedicalReportSummarizer(model_name=model_name)
+    return summarizer
+
+
+def _reduce_report_text(report_text: str) -> str:
+    reduced = reduce_prompt_text(report_text)
+    # A report that is nothing but boilerplate is still better summarized than rejected
+    return reduced.text or report_text
+
+
+def summarize_medical_text(report_text: str, model_name: str = DEFAULT_MODEL_NAME) -> Dict:
     """
     Summarize medical report using LangChain + Groq.
 
+    Repeated page headers/footers and boilerplate are stripped first (see
+    ``reduce_prompt_text``). Summaries are cached by a hash of the normalized
+    report text and the model settings, so re-uploads of the same report
+    skip the LLM call.
+
     Args:
         report_text (str): The medical report text to summarize
         model_name (str): Name of the Groq model to use
@@ -171,9 +445,56 @@ def summarize_medical_text(report_text: str, model_name: str = "llama-3.3-70b-ve
     Returns:
         Dict: Structured summary as a dictionary
     """
-    summarizer = MedicalReportSummarizer(model_name=model_name)
-    summary = summarizer.summarize(report_text)
-    return summary.dict()
+    if not report_text or not isinstance(report_text, str):
+        raise ValueError("Report text must be a non-empty string")
+
+    report_text = _reduce_report_text(report_text)
+    cache_key = summary_cache_key(
+        report_text, model_name, PROMPT_VERSION, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS
+    )
+    cached = get_cached_summary(cache_key)
+    if cached is not None:
+        return cached
+
+    summarizer = get_summarizer(model_name)
+    summary = summarizer.summarize(report_text).dict()
+    store_summary(cache_key, summary)
+    return summary
+
+
+def stream_medical_summary(report_text: str, model_name: str = DEFAULT_MODEL_NAME) -> Iterator[Dict]:
+    """
+    Streaming counterpart of ``summarize_medical_text``.
+
+    Cached summaries are replayed as section events right away; otherwise
+    the events of ``MedicalReportSummarizer.stream`` are passed through and
+    the finished summary is cached.
+
+    Args:
+        report_text (str): The medical report text to summarize
+        model_name (str): Name of the Groq model to use
+
+    Yields:
+        Dict: Token, section and summary events, see ``MedicalReportSummarizer.stream``
+    """
+    if not report_text or not isinstance(report_text, str):
+        raise ValueError("Report text must be a non-empty string")
+
+    report_text = _reduce_report_text(report_text)
+    cache_key = summary_cache_key(
+        report_text, model_name, PROMPT_VERSION, SUMMARY_TEMPERATURE, SUMMARY_MAX_TOKENS
+    )
+    cached = get_cached_summary(cache_key)
+    if cached is not None:
+        for field in SUMMARY_SECTIONS.values():
+            yield {"event": "section", "field": field, "text": cached[field]}
+        yield {"event": "summary", "summary": cached}
+        return
+
+    for event in get_summarizer(model_name).stream(report_text):
+        if event["event"] == "summary":
+            store_summary(cache_key, event["summary"])
+        yield event
 
 # if __name__ == "__main__":
 #     sample_report = """
@@ -0,0 +1,59 @@
+import hashlib
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+def _cache():
+    return caches[settings.SUMMARY_CACHE_ALIAS]
+
+
+def normalize_report_text(report_text: str) -> str:
+    """Collapse whitespace so re-extracted copies of a report hash the same."""
+    return " ".join(report_text.split())
+
+
+def summary_cache_key(report_text: str, model_name: str, prompt_version: str,
+                      temperature: float, max_tokens: int) -> str:
+    """
+    Build the content-addressed cache key for a summary.
+
+    Args:
+        report_text (str): Extracted report text
+        model_name (str): Groq model used for the summary
+        prompt_version (str): Version of the summarization prompt template
+        temperature (float): Sampling temperature of the LLM
+        max_tokens (int): Completion token limit of the LLM
+
+    Returns:
+        str: Cache key for the summary
+    """
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_version, repr(float(temperature)), str(max_tokens)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_report_text(report_text).encode("utf-8"))
+    return f"summary:{digest.hexdigest()}"
+
+
+def get_cached_summary(key: str) -> Optional[Dict]:
+    """Return the cached summary for ``key`` and record a hit or miss."""
+    if not settings.SUMMARY_CACHE_ENABLED:
+        return None
+
+    summary = _cache().get(key)
+    CACHE_REQUESTS.inc(cache="summary", result="hit" if summary is not None else "miss")
+    if summary is not None:
+        logger.info(f"Summary cache hit: {key}")
+    return summary
+
+
+def store_summary(key: str, summary: Dict) -> None:
+    """Store a summary under ``key`` for ``SUMMARY_CACHE_TTL`` seconds."""
+    if settings.SUMMARY_CACHE_ENABLED:
+        _cache().set(key, summary, timeout=settings.SUMMARY_CACHE_TTL)
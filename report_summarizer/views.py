@@ -1,14 +1,23 @@
-import tempfile
+import json
 import logging
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from rest_framework import status
-from .utils.extract_pdf import extract_data_from_medical_report
-from .utils.summarize_pdf import summarize_medical_text
-from rest_framework.permissions import AllowAny
+from core.jobs import submit_job
+from core.models import Job
+from core.pagination import CreatedAtCursorPagination
+from core.utils.deadlines import deadline_for
+from .models import ReportSummary
+from .serializers import ReportSummaryListSerializer, ReportSummarySerializer
+from .utils.batch import aiter_summaries, aiter_summary_events, iter_summaries, iter_summary_events, summarize_uploads
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.views.decorators.csrf import csrf_exempt
 from django.shortcuts import render
+from django.urls import reverse
 
 
 logger = logging.getLogger(__name__)
@@ -28,33 +37,122 @@ class SummarizeReportAPIView(APIView):
         if not files:
             return Response({"detail": "No files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
 
-        summaries = []
-
-        for file in files:
-            logger.info(f"Processing file: {file.name}")
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                    for chunk in file.chunks():
-                        tmp.write(chunk)
-                    tmp.flush()
-                    tmp.seek(0)
-
-                    raw_text = extract_data_from_medical_report(tmp.name, file.name)
-                    logger.info(f"Text extraction successful for: {file.name}")
-
-                    summary = summarize_medical_text(raw_text)
-                    logger.info(f"Summarization successful for: {file.name}")
-
-                summaries.append({
-                    "filename": file.name,
-                    "summary": summary,
-                })
-
-            except Exception as e:
-                logger.exception(f"Failed to process: {file.name}")
-                summaries.append({
-                    "filename": file.name,
-                    "summary": f"Error processing file: {str(e)}",
-                })
+        summaries = summarize_uploads(files, user=request.user, deadline=deadline_for("summarize_report"))
         logger.info(summaries)
         return Response(summaries, status=status.HTTP_200_OK)
+
+
+class SummarizeReportStreamAPIView(APIView):
+    """Stream one NDJSON line per file as soon as its summary is ready."""
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"detail": "No files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        deadline = deadline_for("summarize_report_stream")
+        if isinstance(request._request, ASGIRequest):
+            stream = self._aiter_lines(files, request.user, deadline)
+        else:
+            stream = self._iter_lines(files, request.user, deadline)
+
+        response = StreamingHttpResponse(stream, content_type="application/x-ndjson")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def _line(index, entry) -> str:
+        return json.dumps({"index": index, **entry}) + "\n"
+
+    def _iter_lines(self, files, user, deadline):
+        for index, entry in iter_summaries(files, user=user, deadline=deadline):
+            yield self._line(index, entry)
+
+    async def _aiter_lines(self, files, user, deadline):
+        async for index, entry in aiter_summaries(files, user=user, deadline=deadline):
+            yield self._line(index, entry)
+
+
+class SummarizeReportEventsAPIView(APIView):
+    """
+    Stream summaries token by token as Server-Sent Events.
+
+    ``token`` events carry generated text as it arrives, ``section`` events
+    each finished summary field, and every file ends with a ``summary`` or
+    ``error`` event. All events carry the file's upload ``index``.
+    """
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"detail": "No files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        deadline = deadline_for("summarize_report_stream")
+        if isinstance(request._request, ASGIRequest):
+            stream = self._aiter_frames(files, request.user, deadline)
+        else:
+            stream = self._iter_frames(files, request.user, deadline)
+
+        response = StreamingHttpResponse(stream, content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    @staticmethod
+    def _frame(event) -> str:
+        payload = {key: value for key, value in event.items() if key != "event"}
+        return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+    def _iter_frames(self, files, user, deadline):
+        for event in iter_summary_events(files, user=user, deadline=deadline):
+            yield self._frame(event)
+
+    async def _aiter_frames(self, files, user, deadline):
+        async for event in aiter_summary_events(files, user=user, deadline=deadline):
+            yield self._frame(event)
+
+
+class SummarizeReportJobAPIView(APIView):
+    """Queue report summarization as a background job and return its id right away."""
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"detail": "No files uploaded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user if request.user.is_authenticated else None
+        job = submit_job(Job.KIND_REPORT_SUMMARY, files, user=user)
+        return Response(
+            {"job_id": str(job.id), "status": job.status, "status_url": reverse("job-detail", args=[job.id])},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ReportSummaryListView(ListAPIView):
+    """The user's saved summaries, newest first, without the summary bodies."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReportSummaryListSerializer
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        queryset = ReportSummary.objects.filter(user=self.request.user)
+        content_hash = self.request.query_params.get("content_hash")
+        if content_hash:
+            queryset = queryset.filter(content_hash=content_hash)
+        return queryset.only("id", "filename", "content_hash", "created_at")
+
+
+class ReportSummaryDetailView(RetrieveAPIView):
+    """A saved summary, served without any extraction or LLM work."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ReportSummarySerializer
+
+    def get_queryset(self):
+        return ReportSummary.objects.filter(user=self.request.user)